@@ -0,0 +1,349 @@
+# app/benchmarks.py
+# Bancs d'essai lancés depuis la ligne de commande Flask (voir run.py).
+
+import os
+import statistics
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from app.parsers import (parse_live_scores, parse_finished_matches, parse_match_page, LiveScore, FinishedMatch,
+                         GoalEvent, StatLine, MatchPage, BASE_URL, _statut)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+FIXTURES = {
+    'live': ['live.html'],
+    'finished': ['finished.html'],
+    'match': ['match_stats.html'],
+}
+
+PARSERS = {
+    'live': parse_live_scores,
+    'finished': parse_finished_matches,
+    'match': parse_match_page,
+}
+
+
+def _measure(func, arg, iterations):
+    """Retourne le temps médian d'un appel (en secondes) et le pic d'allocations (en octets)."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+# Références : l'ancienne analyse BeautifulSoup (html.parser), réduite aux mêmes enregistrements
+def _bs4_text(node):
+    return node.text.strip() if node is not None else ""
+
+
+def _bs4_live_scores(html):
+    scores = []
+    for cell in BeautifulSoup(html, "html.parser").select("td.lm3"):
+        eq1, eq2 = cell.select_one("span.lm3_eq1"), cell.select_one("span.lm3_eq2")
+        score1, score2 = cell.select_one("span.scored_1"), cell.select_one("span.scored_2")
+        if eq1 is None or eq2 is None or score1 is None or score2 is None:
+            continue
+        row = cell.find_parent("tr")
+        minute, url, match_id = "", None, None
+        if row is not None:
+            minute = _bs4_text(row.select_one("td.lm2"))
+            link = row.select_one("a")
+            url = f"{BASE_URL}{link.get('href')}" if link is not None and link.get('href') else None
+            match_id = row.get('data-matchid')
+        scores.append(LiveScore(match_id, _bs4_text(eq1), _bs4_text(eq2), f"{_bs4_text(score1)} - {_bs4_text(score2)}", minute, _statut(minute), url))
+    return scores
+
+
+def _bs4_finished_matches(html):
+    finished = []
+    for row in BeautifulSoup(html, "html.parser").select("tr[data-matchid]"):
+        if "TER" not in _bs4_text(row.select_one("td.lm2")):
+            continue
+        eq1, eq2, score = row.select_one("span.lm3_eq1"), row.select_one("span.lm3_eq2"), row.select_one("span.lm3_score")
+        if eq1 is None or eq2 is None or score is None:
+            continue
+        link = row.select_one("a.ga4-matchdetail")
+        url = f"{BASE_URL}{link.get('href')}" if link is not None and link.get('href') else None
+        finished.append(FinishedMatch(row['data-matchid'], _bs4_text(eq1), _bs4_text(eq2), _bs4_text(score), url))
+    return finished
+
+
+def _bs4_match_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+    last_goal = None
+    for row in reversed(soup.select("tr")):
+        if (goal := row.select_one("span.st1.eventTypeG")) is not None:
+            minute = row.select_one("td.c2")
+            last_goal = GoalEvent(_bs4_text(goal), _bs4_text(minute) if minute is not None else None)
+            break
+    penalties = None
+    cells = [td for td in soup.find_all("td") if "Penalties" in td.text and td.find("b") is not None]
+    if cells:
+        penalties = _bs4_text(cells[-1].find("b"))
+    stats, seen_titles = [], set()
+    for block in soup.select("div.progressBar"):
+        title, v1, v2 = block.select_one("h5.progressHeaderTitle"), block.select_one("span.progressBarValue1"), block.select_one("span.progressBarValue2")
+        if title is None or v1 is None or v2 is None:
+            continue
+        if (title_text := _bs4_text(title)) not in seen_titles:
+            seen_titles.add(title_text)
+            stats.append(StatLine(title_text, _bs4_text(v1), _bs4_text(v2)))
+    return MatchPage(last_goal, penalties, tuple(stats))
+
+
+BS4_PARSERS = {
+    'live': _bs4_live_scores,
+    'finished': _bs4_finished_matches,
+    'match': _bs4_match_page,
+}
+
+
+def fixture_paths(fixtures=None):
+    """Jeux d'essai par type de page ; par défaut les pages enregistrées dans tests/fixtures."""
+    if fixtures:
+        return fixtures
+    return {kind: [os.path.join(FIXTURES_DIR, name) for name in names] for kind, names in FIXTURES.items()}
+
+
+def bench_parsers(fixtures, iterations=50):
+    """
+    Mesure chaque parseur sur des pages HTML sauvegardées, face à l'analyse BeautifulSoup de référence.
+    `fixtures` associe un type de page ('live', 'finished', 'match') à une liste de fichiers
+    (par défaut les pages de tests/fixtures).
+    """
+    results = []
+    for kind, paths in fixture_paths(fixtures).items():
+        parser, baseline = PARSERS[kind], BS4_PARSERS[kind]
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            records = parser(html)
+            count = len(records.stats) + (records.last_goal is not None) if kind == 'match' else len(records)
+            parse_time, parse_peak = _measure(parser, html, iterations)
+            if baseline(html) != records:
+                print(f"[ATTENTION] {kind} {os.path.basename(path)} : résultats différents de la référence BeautifulSoup")
+            bs4_time, bs4_peak = _measure(baseline, html, max(1, iterations // 5))
+            results.append((kind, os.path.basename(path), len(html), count, parse_time, parse_peak, bs4_time, bs4_peak))
+            print(f"{kind:<9} {os.path.basename(path):<28} {len(html) / 1024:>7.0f} Ko  {count:>4} enr.  "
+                  f"{parse_time * 1000:>8.2f} ms  pic {parse_peak / 1024:>7.0f} Ko  |  "
+                  f"bs4 {bs4_time * 1000:>8.2f} ms  pic {bs4_peak / 1024:>7.0f} Ko  (x{bs4_time / parse_time if parse_time else 0:.0f})")
+    return results
+
+
+def save_fixtures(fetcher, directory, live_url, finished_url):
+    """Enregistre les pages actuelles de matchendirect pour servir de jeux d'essai."""
+    os.makedirs(directory, exist_ok=True)
+    saved = []
+    pages = [('live.html', live_url, "td.lm3"), ('finished.html', finished_url, "tr[data-matchid]")]
+    for name, url, selector in pages:
+        html = fetcher.fetch(url, selector, wait=15)
+        if not html:
+            print(f"Page indisponible : {url}")
+            continue
+        if name == 'live.html':
+            # On garde aussi la page de statistiques du premier match en direct
+            match_url = next((m.url for m in parse_live_scores(html) if m.url), None)
+            if match_url:
+                pages.append(('match_stats.html', f"{match_url.split('?')[0]}?p=stats", None))
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        saved.append(path)
+        print(f"Enregistré : {path}")
+    return saved
+
+
+def _live_cycle(size, cycle):
+    """`size` matchs en direct ; à chaque cycle, ~10 % changent de score et ~3 % sont remplacés."""
+    from app.parsers import LiveScore
+    renewed = max(1, size * 3 // 100)
+    scores = []
+    for i in range(size):
+        match_id = f"c{cycle}-{i}" if i < renewed else f"{i}"
+        goals = cycle if i % 10 == 0 else 0
+        scores.append(LiveScore(match_id, f"Équipe {match_id}A", f"Équipe {match_id}B", f"{goals} - 0", "67'", "", f"/match/{match_id}"))
+    return scores
+
+
+def _legacy_persist(session, new_scores):
+    # Ancien chemin : lecture de toute la table, puis une instruction ORM par ligne
+    from app.models import GlobalMatchState
+    old_rows = session.query(GlobalMatchState).all()
+    old_scores = {s.match_key: s for s in old_rows}
+    current_keys = {m.match_id for m in new_scores}
+    for state in old_rows:
+        if state.match_key not in current_keys: session.delete(state)
+    for data in new_scores:
+        state = old_scores.get(data.match_id)
+        if state: state.score, state.statut, state.minute, state.url, state.eq1, state.eq2 = data.score, data.statut, data.minute, data.url, data.eq1, data.eq2
+        else: session.add(GlobalMatchState(match_key=data.match_id, score=data.score, statut=data.statut, minute=data.minute, url=data.url, eq1=data.eq1, eq2=data.eq2))
+
+
+def bench_match_state(sizes=(50, 300, 1000), database_uri='sqlite://', cycles=5):
+    """
+    Compare l'écriture de l'état des matchs par l'ORM ligne à ligne et par instantané ensembliste.
+    Compte les instructions SQL envoyées et mesure le temps d'écriture jusqu'au commit.
+    """
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+    from app.models import GlobalMatchState
+    from app.match_state import MatchStateStore, save_snapshot
+
+    results = []
+    for size in sizes:
+        for mode in ('orm', 'bulk'):
+            engine = create_engine(database_uri)
+            GlobalMatchState.__table__.drop(engine, checkfirst=True)
+            GlobalMatchState.__table__.create(engine)
+            counter = {'statements': 0, 'parameter_sets': 0}
+            with Session(engine) as session:
+                store = MatchStateStore()
+                store.load([])
+                store.apply(_live_cycle(size, 0))
+                save_snapshot(session, *store.take_snapshot())
+                session.commit()
+
+                @event.listens_for(engine, "before_cursor_execute")
+                def count(conn, cursor, statement, parameters, context, executemany):
+                    counter['statements'] += 1
+                    counter['parameter_sets'] += len(parameters) if executemany else 1
+
+                timings = []
+                for cycle in range(1, cycles + 1):
+                    live = _live_cycle(size, cycle)
+                    start = time.perf_counter()
+                    if mode == 'orm':
+                        _legacy_persist(session, live)
+                    else:
+                        store.apply(live)
+                        save_snapshot(session, *store.take_snapshot())
+                    session.commit()
+                    timings.append(time.perf_counter() - start)
+                    session.expunge_all()
+            engine.dispose()
+            per_cycle, sets_per_cycle = counter['statements'] / cycles, counter['parameter_sets'] / cycles
+            results.append((size, mode, per_cycle, sets_per_cycle, statistics.median(timings)))
+            print(f"{size:>5} matchs  {mode:<5} {per_cycle:>7.1f} instruction(s)/cycle  {sets_per_cycle:>7.1f} exécution(s)/cycle  "
+                  f"{statistics.median(timings) * 1000:>8.2f} ms jusqu'au commit")
+    return results
+
+
+class _GraphStub:
+    """Serveur Graph API local : répond aux publications individuelles et groupées après `latency` secondes."""
+
+    def __init__(self, latency=0.03, failure_rate=0.0):
+        import threading
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        from urllib.parse import parse_qs
+        import json, random
+        stub = self
+        self.requests = 0
+        self.operations = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8'))
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(latency)
+                if 'batch' in form:
+                    operations = json.loads(form['batch'][0])
+                    payload = []
+                    for op in operations:
+                        if random.random() < failure_rate:
+                            payload.append({'code': 500, 'body': json.dumps({'error': {'message': 'erreur simulée', 'code': 2}})})
+                        else:
+                            payload.append({'code': 200, 'body': json.dumps({'id': f"{op['relative_url'].split('/')[0]}_1"})})
+                    with stub._lock:
+                        stub.operations += len(operations)
+                else:
+                    payload = {'id': f"{self.path.strip('/').split('/')[1]}_1"}
+                    with stub._lock:
+                        stub.operations += 1
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        self.requests = self.operations = 0
+
+    def close(self):
+        self.server.shutdown()
+
+
+def bench_graph_batch(pages=500, latency=0.03, workers=16, batch_size=50, failure_rate=0.0):
+    """
+    Publie un message sur `pages` pages fictives via un serveur Graph local, en appels
+    individuels puis en requêtes groupées, et compare requêtes HTTP, temps total et latences.
+    """
+    from facebook import GraphAPI
+    from app.fanout import FanoutEngine, PageTarget, latency_report
+    from app.token_cache import PageClientCache
+    from app.graph_batch import make_senders, set_graph_base
+
+    stub = _GraphStub(latency, failure_rate)
+    set_graph_base(stub.base_url)
+    engine = FanoutEngine(max_workers=workers, page_rate=1000, page_burst=1000, app_rate=100000, app_burst=100000)
+    clients = PageClientCache(lambda token: token, lambda token: GraphAPI(access_token=token, session=engine.session))
+    targets = [(i, PageTarget(f"{100000 + i}", f"Page {i}", f"jeton-{i}"), None) for i in range(pages)]
+    send, send_grouped = make_senders(clients, "⚽ Banc d'essai", stub.base_url)
+    results = []
+    try:
+        for mode in ('individuel', 'groupé'):
+            stub.reset()
+            start = time.perf_counter()
+            if mode == 'individuel':
+                deliveries = engine.broadcast(targets, send, key=lambda target: target[1].page_id)
+            else:
+                deliveries = engine.broadcast_batched(targets, send_grouped, key=lambda target: target[1].page_id, batch_size=batch_size)
+            wall = time.perf_counter() - start
+            report = latency_report(deliveries)
+            results.append((mode, stub.requests, wall, report))
+            print(f"{mode:<11} {pages} pages  {stub.requests:>5} requête(s) HTTP  {wall:>6.2f} s  "
+                  f"p50 {report['p50'] * 1000:>6.0f} ms  p99 {report['p99'] * 1000:>6.0f} ms  échecs {report['failed']}")
+    finally:
+        engine.shutdown()
+        stub.close()
+    return results
+
+
+def bench_shards(pages=5000, max_nodes=8, replicas=100):
+    """
+    Répartition de `pages` pages sur 1 à `max_nodes` publishers : la part du nœud le plus chargé
+    borne le débit (accélération = 1 / part max), et l'arrivée d'un nœud ne doit déplacer qu'environ 1/N des pages.
+    """
+    from collections import Counter
+    from app.sharding import HashRing
+
+    page_ids = [f"{100000000000 + i * 7919}" for i in range(pages)]
+    previous, results = None, []
+    for n in range(1, max_nodes + 1):
+        ring = HashRing([f"publisher-{i}" for i in range(n)], replicas)
+        owners = {page_id: ring.owner(page_id) for page_id in page_ids}
+        shares = Counter(owners.values())
+        max_share = max(shares.values()) / pages
+        moved = sum(1 for page_id in page_ids if owners[page_id] != previous[page_id]) / pages if previous else 0.0
+        previous = owners
+        results.append((n, max_share, moved))
+        print(f"{n:>2} publisher(s)  part max {max_share:>6.1%} (idéal {1 / n:>6.1%})  part min {min(shares.values()) / pages:>6.1%}  "
+              f"accélération {1 / max_share:>5.2f}x  pages déplacées {moved:>6.1%} (idéal {1 / n if n > 1 else 0:>6.1%})")
+    return results
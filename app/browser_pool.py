@@ -0,0 +1,207 @@
+# app/browser_pool.py
+# Pool de navigateurs Chrome headless réutilisés d'un cycle à l'autre par le worker.
+
+import os
+import threading
+import time
+from queue import LifoQueue, Empty
+from app.metrics import log
+
+
+def _process_tree_rss_mb(root_pid):
+    """Retourne la mémoire résidente (en Mo) d'un processus et de tous ses descendants (Linux uniquement)."""
+    if not root_pid or not os.path.isdir('/proc'):
+        return 0.0
+    parents, rss_pages = {}, {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        pid = int(entry)
+        parents[pid] = int(fields[1])
+        rss_pages[pid] = int(fields[21])
+    tree, frontier = {root_pid}, [root_pid]
+    while frontier:
+        current = frontier.pop()
+        for pid, ppid in parents.items():
+            if ppid == current and pid not in tree:
+                tree.add(pid)
+                frontier.append(pid)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    return sum(rss_pages.get(pid, 0) for pid in tree) * page_size / (1024 * 1024)
+
+
+class PooledDriver:
+    """Enveloppe un webdriver Selenium et compte les chargements de page effectués."""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.page_loads = 0
+        self.created_at = time.time()
+
+    def get(self, url):
+        self.page_loads += 1
+        return self._driver.get(url)
+
+    def rss_mb(self):
+        try:
+            return _process_tree_rss_mb(self._driver.service.process.pid)
+        except Exception:
+            return 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class BrowserPool:
+    """
+    Garde des navigateurs chauds entre les cycles. Un navigateur est vérifié avant
+    chaque prêt et recyclé après `max_page_loads` chargements ou au-delà de `max_rss_mb`.
+    """
+
+    def __init__(self, factory, size=2, max_page_loads=150, max_rss_mb=600):
+        self._factory = factory
+        self.size = max(1, size)
+        self.max_page_loads = max_page_loads
+        self.max_rss_mb = max_rss_mb
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        # Compteurs cumulés depuis le démarrage du worker
+        self.cold_starts = 0
+        self.cold_start_seconds = 0.0
+        self.warm_acquires = 0
+        self.warm_acquire_seconds = 0.0
+        self.recycled = {'page_loads': 0, 'rss': 0, 'unhealthy': 0}
+        self._cycle_mark = (0, 0.0)
+
+    # --- Cycle de vie des navigateurs ---
+
+    def _start_driver(self):
+        start = time.perf_counter()
+        driver = self._factory()
+        if driver is None:
+            with self._lock:
+                self._created -= 1
+            return None
+        self.cold_starts += 1
+        self.cold_start_seconds += time.perf_counter() - start
+        return PooledDriver(driver)
+
+    def _discard(self, driver, reason=None):
+        if reason:
+            self.recycled[reason] += 1
+            log('browser_pool.recycled', "Recyclage d'un navigateur", reason=reason, page_loads=driver.page_loads)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _recycle_reason(self, driver):
+        if driver.page_loads >= self.max_page_loads:
+            return 'page_loads'
+        if self.max_rss_mb and driver.rss_mb() > self.max_rss_mb:
+            return 'rss'
+        return None
+
+    def warm_up(self, count=1):
+        """Démarre des navigateurs à l'avance pour que le premier cycle n'attende pas Chrome."""
+        for _ in range(min(count, self.size)):
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            driver = self._start_driver()
+            if driver:
+                self._idle.put(driver)
+
+    def acquire(self, timeout=30):
+        """Prête un navigateur en bon état, ou None si aucun ne peut être obtenu."""
+        if self._closed:
+            return None
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                driver = None
+            if driver is None:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    return self._start_driver()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    log('browser_pool.exhausted', "Aucun navigateur disponible dans le délai imparti", level='warning')
+                    return None
+                try:
+                    driver = self._idle.get(timeout=remaining)
+                except Empty:
+                    continue
+            if self._is_healthy(driver):
+                self.warm_acquires += 1
+                self.warm_acquire_seconds += time.perf_counter() - start
+                return driver
+            self._discard(driver, 'unhealthy')
+
+    def release(self, driver):
+        """Rend un navigateur au pool, ou le ferme s'il a atteint une limite de recyclage."""
+        if driver is None:
+            return
+        reason = self._recycle_reason(driver)
+        if self._closed or reason:
+            self._discard(driver, reason)
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(driver)
+
+    # --- Métriques ---
+
+    @property
+    def avg_cold_start(self):
+        return self.cold_start_seconds / self.cold_starts if self.cold_starts else 0.0
+
+    def seconds_saved(self, warm_acquires=None, warm_seconds=None):
+        """Temps économisé par rapport à un démarrage à froid pour chaque prêt de navigateur chaud."""
+        warm_acquires = self.warm_acquires if warm_acquires is None else warm_acquires
+        warm_seconds = self.warm_acquire_seconds if warm_seconds is None else warm_seconds
+        return max(0.0, warm_acquires * self.avg_cold_start - warm_seconds)
+
+    def cycle_report(self):
+        """Retourne les métriques du cycle écoulé depuis le dernier appel, plus les cumuls."""
+        last_acquires, last_seconds = self._cycle_mark
+        cycle_acquires = self.warm_acquires - last_acquires
+        cycle_seconds = self.warm_acquire_seconds - last_seconds
+        self._cycle_mark = (self.warm_acquires, self.warm_acquire_seconds)
+        return {
+            'warm_acquires': cycle_acquires,
+            'saved_seconds': self.seconds_saved(cycle_acquires, cycle_seconds),
+            'avg_cold_start': self.avg_cold_start,
+            'total_saved_seconds': self.seconds_saved(),
+            'cold_starts': self.cold_starts,
+            'recycled': dict(self.recycled),
+        }
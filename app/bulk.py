@@ -0,0 +1,64 @@
+# app/bulk.py
+# Écritures ensemblistes : un INSERT ... ON CONFLICT multi-lignes et un DELETE ... IN
+# par lot, au lieu d'une instruction ORM par ligne.
+
+import sqlite3
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# Nombre maximal de paramètres liés par instruction (SQLite avant 3.32 n'en accepte que 999)
+_SQLITE_MAX_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999
+_MAX_PARAMS = 30000
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def upsert(session, model, rows, key, update_columns=None):
+    """
+    Insère `rows` (dicts de colonnes) ou met à jour les lignes existantes qui ont la même
+    valeur de `key` (colonne unique). Retourne le nombre d'instructions envoyées.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    dialect = _dialect(session)
+    columns = list(rows[0])
+    update_columns = update_columns or [c for c in columns if c != key]
+    max_params = _SQLITE_MAX_PARAMS if dialect == 'sqlite' else _MAX_PARAMS
+    statements = 0
+    for chunk in chunks(rows, max(1, max_params // len(columns))):
+        if dialect in ('postgresql', 'sqlite'):
+            insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table).values(chunk)
+            stmt = insert.on_conflict_do_update(index_elements=[key], set_={c: insert.excluded[c] for c in update_columns})
+        elif dialect in ('mysql', 'mariadb'):
+            insert = mysql.insert(table).values(chunk)
+            stmt = insert.on_duplicate_key_update({c: insert.inserted[c] for c in update_columns})
+        else:
+            # Autre base : suppression puis insertion du lot, deux instructions
+            delete_in(session, model, key, [row[key] for row in chunk])
+            session.execute(table.insert(), chunk)
+            statements += 2
+            continue
+        session.execute(stmt)
+        statements += 1
+    return statements
+
+
+def delete_in(session, model, column, values):
+    """Supprime les lignes dont `column` vaut l'une des `values`. Retourne le nombre d'instructions."""
+    values = list(values)
+    if not values:
+        return 0
+    attribute = getattr(model, column)
+    max_params = _SQLITE_MAX_PARAMS if _dialect(session) == 'sqlite' else _MAX_PARAMS
+    statements = 0
+    for chunk in chunks(values, max_params):
+        session.query(model).filter(attribute.in_(chunk)).delete(synchronize_session=False)
+        statements += 1
+    return statements
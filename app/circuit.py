@@ -0,0 +1,127 @@
+# app/circuit.py
+# Disjoncteur par page Facebook : après des erreurs Graph, la page n'est plus appelée pendant
+# la diffusion ; une sonde en arrière-plan vérifie quand elle redevient joignable.
+
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from app.fanout import RateLimited
+
+TRANSIENT = 'transient'
+THROTTLED = 'throttled'
+PERMANENT = 'permanent'
+
+# Codes Graph : jeton invalide ou expiré (190, 102), permissions retirées (10, 200-299)
+PERMANENT_CODES = {10, 102, 190} | set(range(200, 300))
+# Limites d'appels de l'application (4), de l'utilisateur (17), de la page (32, 80001), d'une action (613),
+# blocage temporaire (368)
+THROTTLED_CODES = {4, 17, 32, 368, 613, 80001}
+
+
+def classify(error):
+    code = getattr(error, 'code', None)
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return TRANSIENT
+    if code in PERMANENT_CODES:
+        return PERMANENT
+    if code in THROTTLED_CODES:
+        return THROTTLED
+    return TRANSIENT
+
+
+class Circuit:
+    __slots__ = ('kind', 'failures', 'openings', 'retry_at', 'token', 'last_error')
+
+    def __init__(self):
+        self.kind = None          # None tant que le circuit est fermé
+        self.failures = 0         # échecs temporaires consécutifs
+        self.openings = 0         # ouvertures consécutives, pour allonger la pause
+        self.retry_at: Optional[datetime] = None
+        self.token = None
+        self.last_error = None
+
+
+class PageCircuitBreaker:
+    """
+    Un circuit par page :
+    - erreur permanente (jeton, permissions) : ouvert jusqu'à une sonde réussie ou un nouveau jeton ;
+    - limitation de débit : ouvert tout de suite pour `throttle_seconds` ;
+    - erreur temporaire : ouvert après `failure_threshold` échecs consécutifs, pour `open_seconds`.
+    La pause est doublée à chaque réouverture, jusqu'à `max_open_seconds`.
+    """
+
+    def __init__(self, failure_threshold=3, open_seconds=60, max_open_seconds=1800, throttle_seconds=300, reauth_probe_seconds=900):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.throttle_seconds = throttle_seconds
+        self.reauth_probe_seconds = reauth_probe_seconds
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def _pause(self, circuit, base_seconds):
+        return min(self.max_open_seconds, base_seconds * 2 ** max(0, circuit.openings - 1))
+
+    def blocked(self, page_id, token=None):
+        """Circuit ouvert de la page, ou None. Un nouveau jeton (page reconnectée) referme le circuit."""
+        with self._lock:
+            circuit = self._circuits.get(page_id)
+            if circuit is None or circuit.kind is None:
+                return None
+            if token is not None and circuit.token is not None and token != circuit.token:
+                del self._circuits[page_id]
+                return None
+            self.skipped += 1
+            return circuit
+
+    def record_success(self, page_id):
+        with self._lock:
+            return self._circuits.pop(page_id, None) is not None
+
+    def record_failure(self, page_id, error, token=None, now=None):
+        """Retourne (catégorie, True si le circuit vient de passer dans cet état)."""
+        if isinstance(error, RateLimited):
+            return TRANSIENT, False  # limite locale, la page n'est pas en cause
+        kind = classify(error)
+        now = now or datetime.utcnow()
+        with self._lock:
+            circuit = self._circuits.setdefault(page_id, Circuit())
+            circuit.token = token or circuit.token
+            circuit.last_error = str(error)[:300]
+            if kind == TRANSIENT and circuit.kind is None:
+                circuit.failures += 1
+                if circuit.failures < self.failure_threshold:
+                    return kind, False
+            opened = circuit.kind != kind
+            circuit.kind = kind
+            circuit.failures = 0
+            circuit.openings += 1
+            if kind == PERMANENT:
+                pause = self.reauth_probe_seconds
+            else:
+                pause = self._pause(circuit, self.throttle_seconds if kind == THROTTLED else self.open_seconds)
+            circuit.retry_at = now + timedelta(seconds=pause)
+            return kind, opened
+
+    def due_probes(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            return [page_id for page_id, c in self._circuits.items() if c.kind is not None and c.retry_at <= now]
+
+    def forget(self, page_id):
+        with self._lock:
+            self._circuits.pop(page_id, None)
+
+    def report(self):
+        with self._lock:
+            kinds = [c.kind for c in self._circuits.values() if c.kind is not None]
+        return {
+            'open': len(kinds),
+            'permanent': kinds.count(PERMANENT),
+            'throttled': kinds.count(THROTTLED),
+            'transient': kinds.count(TRANSIENT),
+            'skipped': self.skipped,
+        }
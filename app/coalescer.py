@@ -0,0 +1,105 @@
+# app/coalescer.py
+# Étape entre la détection des événements et la diffusion : une seule publication par match
+# dans la fenêtre de fusion, budget global de publications et ordre de priorité.
+
+import threading
+import time
+from app.fanout import TokenBucket
+
+GOAL_PRIORITY = 0        # buts et buts refusés
+FULL_TIME_PRIORITY = 1
+HALF_TIME_PRIORITY = 2
+KICKOFF_PRIORITY = 3     # coups d'envoi et matchs découverts en cours (ex : après remise à zéro de l'état)
+SUMMARY_PRIORITY = 4
+
+# Au-delà de ce délai, un événement secondaire n'a plus d'intérêt et n'est pas publié
+DEFAULT_DEADLINES = {HALF_TIME_PRIORITY: 600, KICKOFF_PRIORITY: 120, SUMMARY_PRIORITY: 300}
+
+
+class PendingPost:
+    __slots__ = ('key', 'priority', 'payload', 'created_at', 'ready_at', 'deadline', 'merged')
+
+    def __init__(self, key, priority, payload, created_at, ready_at, deadline):
+        self.key = key
+        self.priority = priority
+        self.payload = payload
+        self.created_at = created_at
+        self.ready_at = ready_at
+        self.deadline = deadline
+        self.merged = 0
+
+
+class Coalescer:
+    """
+    Publications en attente, une par clé (le match). Un nouvel événement pour un match déjà en
+    attente remplace son message (l'état le plus récent l'emporte) et garde la plus haute des
+    deux priorités, sauf si le message en attente est plus important (ou de priorité `keep_priorities`,
+    les buts) : les deux sont alors fusionnés par `merge(ancien, nouveau)`, ou, sans `merge`, le nouvel
+    événement attend comme publication distincte. `release()` rend les publications dont la fenêtre
+    est écoulée, par priorité puis ancienneté, dans la limite de `burst_budget` publications par
+    `burst_seconds` ; le reste attend le cycle suivant, sauf les événements secondaires dont l'échéance est passée.
+    """
+
+    def __init__(self, window_seconds=0, burst_budget=30, burst_seconds=60, deadlines=None, merge=None, keep_priorities=(GOAL_PRIORITY,)):
+        self.window_seconds = window_seconds
+        self.deadlines = DEFAULT_DEADLINES if deadlines is None else deadlines
+        self.merge = merge
+        self.keep_priorities = frozenset(keep_priorities)
+        self._budget = TokenBucket(burst_budget / burst_seconds, burst_budget)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.released = 0
+        self.merged = 0
+        self.dropped = 0
+
+    def _deadline(self, priority, since):
+        seconds = self.deadlines.get(priority)
+        return since + seconds if seconds is not None else None
+
+    def add(self, key, priority, payload, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            post = self._pending.get(key)
+            if post is None:
+                self._pending[key] = PendingPost(key, priority, payload, now, now + self.window_seconds, self._deadline(priority, now))
+                return
+            if post.priority < priority or post.priority in self.keep_priorities:
+                # Le message en attente ne doit pas disparaître derrière un événement moins important
+                if self.merge is None:
+                    separate = self._pending.get((key, priority))
+                    if separate is None:
+                        self._pending[(key, priority)] = PendingPost((key, priority), priority, payload, now, now + self.window_seconds,
+                                                                     self._deadline(priority, now))
+                    else:
+                        separate.payload = payload
+                    return
+                post.payload = self.merge(post.payload, payload)
+            else:
+                post.payload = payload
+            if priority < post.priority:
+                post.priority = priority
+                post.deadline = self._deadline(priority, post.created_at)
+            post.merged += 1
+            self.merged += 1
+
+    def release(self, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            for key in [k for k, p in self._pending.items() if p.deadline is not None and p.deadline < now]:
+                del self._pending[key]
+                self.dropped += 1
+            ready = sorted((p for p in self._pending.values() if p.ready_at <= now), key=lambda p: (p.priority, p.created_at))
+            released = []
+            for post in ready:
+                if not self._budget.acquire(max_wait=0):
+                    break
+                del self._pending[post.key]
+                released.append(post)
+            self.released += len(released)
+            return released
+
+    def __contains__(self, key):
+        return key in self._pending
+
+    def __len__(self):
+        return len(self._pending)
@@ -0,0 +1,83 @@
+# app/cycles.py
+# Exécution des cycles planifiés : un seul cycle à la fois par processus, avec une échéance ferme.
+
+import threading
+import time
+from collections import deque
+from app.metrics import log
+
+
+class CycleRunner:
+    """
+    Garantit qu'un seul cycle est en cours dans le processus. Un déclenchement qui arrive
+    pendant un cycle est ignoré et compté. Le cycle reçoit une échéance (`remaining()`,
+    `expired()`) et sa durée est comparée à l'intervalle prévu pour compter les dépassements.
+    """
+
+    def __init__(self, name, deadline_seconds=20, history=500):
+        self.name = name
+        self.deadline_seconds = deadline_seconds
+        self._lock = threading.Lock()
+        self._deadline = None
+        self.durations = deque(maxlen=history)
+        self.runs = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.overrun_seconds = 0.0
+        self.max_duration = 0.0
+        self.deadline_misses = 0
+
+    def remaining(self):
+        if self._deadline is None:
+            return self.deadline_seconds
+        return max(0.0, self._deadline - time.monotonic())
+
+    def expired(self):
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def run(self, func, interval_seconds):
+        """Exécute `func` si aucun cycle n'est en cours ; retourne False si le déclenchement est ignoré."""
+        if not self._lock.acquire(blocking=False):
+            self.skipped += 1
+            log('cycle.skipped', "Cycle précédent encore en cours, déclenchement ignoré", level='warning', job=self.name, skipped=self.skipped)
+            return False
+        start = time.monotonic()
+        self._deadline = start + self.deadline_seconds
+        try:
+            func()
+        finally:
+            duration = time.monotonic() - start
+            self._record(duration, interval_seconds)
+            self._deadline = None
+            self._lock.release()
+        return True
+
+    def _record(self, duration, interval_seconds):
+        self.runs += 1
+        self.durations.append(duration)
+        self.max_duration = max(self.max_duration, duration)
+        if duration > self.deadline_seconds:
+            self.deadline_misses += 1
+        if duration > interval_seconds:
+            self.overruns += 1
+            self.overrun_seconds += duration - interval_seconds
+            log('cycle.overrun', "Cycle plus long que son intervalle", level='warning', job=self.name,
+                duration_seconds=round(duration, 2), interval_seconds=interval_seconds)
+
+    def percentile(self, p):
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def report(self):
+        return {
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'overruns': self.overruns,
+            'overrun_seconds': self.overrun_seconds,
+            'deadline_misses': self.deadline_misses,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': self.max_duration,
+        }
@@ -0,0 +1,110 @@
+# app/delivery_log.py
+# Journal des publications par page : une ligne par tentative, écrite en bloc à la fin de chaque
+# diffusion, et agrégats pour les tableaux de bord client et administrateur.
+
+from datetime import datetime, timedelta
+from sqlalchemy import func, case
+from app.models import DeliveryLog
+from app.outbox import SENT, DEAD
+
+FAILED = 'failed'  # échec avec nouvelle tentative prévue
+
+
+def error_code(error):
+    """Code d'erreur Graph s'il existe (ex : '190'), sinon le type de l'exception."""
+    code = getattr(error, 'code', None)
+    return str(code) if code is not None else type(error).__name__[:50]
+
+
+def log_row(delivery, latency, error=None, now=None):
+    """Ligne du journal pour un envoi déjà marqué (mark_sent / mark_failed)."""
+    return {
+        'message_id': delivery.message_id,
+        'facebook_page_id': delivery.facebook_page_id,
+        'status': SENT if error is None else (DEAD if delivery.status == DEAD else FAILED),
+        'attempt': delivery.attempts,
+        'latency_ms': int(latency * 1000),
+        'post_id': delivery.post_id if error is None else None,
+        'error_code': error_code(error) if error is not None else None,
+        'created_at': now or datetime.utcnow(),
+    }
+
+
+def write(session, rows):
+    """Insertion groupée en une instruction (le commit reste à l'appelant)."""
+    if rows:
+        session.execute(DeliveryLog.__table__.insert(), rows)
+    return len(rows)
+
+
+def _aggregates():
+    sent = func.sum(case((DeliveryLog.status == SENT, 1), else_=0))
+    return (DeliveryLog.facebook_page_id,
+            func.count(DeliveryLog.id).label('attempts'),
+            sent.label('sent'),
+            func.avg(case((DeliveryLog.status == SENT, DeliveryLog.latency_ms))).label('avg_latency_ms'),
+            func.max(DeliveryLog.latency_ms).label('max_latency_ms'),
+            func.max(DeliveryLog.created_at).label('last_at'))
+
+
+def _as_dict(row):
+    attempts = row.attempts or 0
+    sent = int(row.sent or 0)
+    return {
+        'facebook_page_id': row.facebook_page_id,
+        'attempts': attempts,
+        'sent': sent,
+        'failed': attempts - sent,
+        'failure_rate': (attempts - sent) / attempts if attempts else 0.0,
+        'avg_latency_ms': float(row.avg_latency_ms or 0),
+        'max_latency_ms': row.max_latency_ms or 0,
+        'last_at': row.last_at,
+    }
+
+
+def page_stats(session, page_ids, days=7):
+    """Agrégats par page sur les `days` derniers jours, indexés par facebook_page_id."""
+    if not page_ids:
+        return {}
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = (session.query(*_aggregates())
+            .filter(DeliveryLog.facebook_page_id.in_(page_ids), DeliveryLog.created_at >= since)
+            .group_by(DeliveryLog.facebook_page_id).all())
+    return {row.facebook_page_id: _as_dict(row) for row in rows}
+
+
+def slowest_pages(session, days=7, limit=20, min_sent=5):
+    """Pages dont la latence moyenne des publications réussies est la plus élevée."""
+    since = datetime.utcnow() - timedelta(days=days)
+    columns = _aggregates()
+    rows = (session.query(*columns)
+            .filter(DeliveryLog.created_at >= since)
+            .group_by(DeliveryLog.facebook_page_id)
+            .having(columns[2] >= min_sent)
+            .order_by(columns[3].desc())
+            .limit(limit).all())
+    return [_as_dict(row) for row in rows]
+
+
+def failing_pages(session, days=7, limit=20):
+    """Pages qui cumulent le plus d'échecs, avec le code d'erreur le plus récent."""
+    since = datetime.utcnow() - timedelta(days=days)
+    columns = _aggregates()
+    failed = columns[1] - columns[2]
+    rows = (session.query(*columns)
+            .filter(DeliveryLog.created_at >= since)
+            .group_by(DeliveryLog.facebook_page_id)
+            .having(failed > 0)
+            .order_by(failed.desc())
+            .limit(limit).all())
+    stats = [_as_dict(row) for row in rows]
+    for item in stats:
+        item['last_error_code'] = (session.query(DeliveryLog.error_code)
+                                   .filter(DeliveryLog.facebook_page_id == item['facebook_page_id'], DeliveryLog.error_code.isnot(None))
+                                   .order_by(DeliveryLog.created_at.desc()).limit(1).scalar())
+    return stats
+
+
+def prune(session, retention_days):
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    return session.query(DeliveryLog).filter(DeliveryLog.created_at < cutoff).delete(synchronize_session=False)
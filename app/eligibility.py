@@ -0,0 +1,74 @@
+# app/eligibility.py
+# Pages éligibles à la publication, gardées en mémoire entre deux événements qui les modifient.
+
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+from app.models import GlobalState
+
+VERSION_KEY = 'eligible_pages_version'
+
+
+class EligiblePage(NamedTuple):
+    facebook_page_id: str
+    page_name: str
+
+
+def read_version(session):
+    row = session.query(GlobalState.value).filter_by(key=VERSION_KEY).first()
+    return row[0] if row else None
+
+
+def bump_version(session):
+    """Signale aux autres processus que l'éligibilité a changé (le commit reste à l'appelant)."""
+    row = session.query(GlobalState).filter_by(key=VERSION_KEY).first()
+    if row is None:
+        session.add(GlobalState(key=VERSION_KEY, value=uuid.uuid4().hex))
+    else:
+        row.value = uuid.uuid4().hex
+
+
+class EligiblePagesCache:
+    """
+    Liste des pages éligibles, reconstruite seulement :
+    - après `invalidate()` (événement dans ce processus) ;
+    - quand la version partagée en base a changé (événement dans un autre processus),
+      vérifiée au plus toutes les `version_check_seconds` ;
+    - quand la plus proche fin d'essai est atteinte.
+    `load(now)` retourne (pages, prochaine échéance ou None).
+    """
+
+    def __init__(self, load, read_version, version_check_seconds=30):
+        self._load = load
+        self._read_version = read_version
+        self.version_check_seconds = version_check_seconds
+        self._pages = None
+        self._expires_at = None
+        self._version = None
+        self._next_version_check = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._pages = None
+
+    def get(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            if self._pages is not None and time.monotonic() >= self._next_version_check:
+                self._next_version_check = time.monotonic() + self.version_check_seconds
+                if self._read_version() != self._version:
+                    self._pages = None
+            if self._pages is not None and (self._expires_at is None or now < self._expires_at):
+                self.hits += 1
+                return self._pages
+            # La version est lue avant la liste : un changement entre les deux sera vu au prochain contrôle
+            self._version = self._read_version()
+            self._next_version_check = time.monotonic() + self.version_check_seconds
+            self._pages, self._expires_at = self._load(now)
+            self.rebuilds += 1
+            return self._pages
@@ -0,0 +1,152 @@
+# app/enrichment.py
+# Récupérations d'enrichissement (buteur, statistiques, tirs au but) exécutées en parallèle.
+
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from app.metrics import log
+
+
+class EnrichmentRunner:
+    """
+    Exécute les récupérations d'un cycle sur un nombre borné de workers, dans un budget
+    de temps commun au cycle. Une récupération qui dépasse le budget rend None, ou est
+    reportée au cycle suivant si l'appelant le demande.
+    """
+
+    def __init__(self, max_workers=4, budget_seconds=15):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+        self.budget_seconds = budget_seconds
+        self._deadline = None
+        self._deferred = {}
+        self.completed = 0
+        self.failed = 0
+        self.late = 0
+
+    def start_cycle(self, budget_seconds=None):
+        self._deadline = time.monotonic() + (self.budget_seconds if budget_seconds is None else budget_seconds)
+
+    def remaining(self):
+        if self._deadline is None:
+            return self.budget_seconds
+        return max(0.0, self._deadline - time.monotonic())
+
+    def run(self, jobs, defer=False):
+        """
+        `jobs` associe une clé à (fonction, arguments). Rend les couples (clé, résultat)
+        dans l'ordre où les récupérations se terminent, puis ceux qui ont manqué le budget.
+        Avec `defer`, une récupération en retard n'est pas rendue : elle continue en
+        arrière-plan et sera reprise par `run_deferred()` au cycle suivant.
+        """
+        futures = {self._executor.submit(func, *args): key for key, (func, args) in jobs.items()}
+        yield from self._collect(futures, defer)
+
+    def run_deferred(self):
+        """Rend les récupérations reportées au cycle précédent ; une seule remise est accordée."""
+        futures = {future: key for key, future in self._deferred.items()}
+        self._deferred = {}
+        yield from self._collect(futures, defer=False)
+
+    @property
+    def deferred_keys(self):
+        return set(self._deferred)
+
+    def _collect(self, futures, defer):
+        pending = set(futures)
+        try:
+            for future in as_completed(futures, timeout=self.remaining()):
+                pending.discard(future)
+                try:
+                    result = future.result()
+                    self.completed += 1
+                except Exception as e:
+                    log('enrichment.task_failed', "Enrichissement en échec", level='error', key=futures[future], error=str(e))
+                    self.failed += 1
+                    result = None
+                yield futures[future], result
+        except TimeoutError:
+            pass
+        for future in pending:
+            self.late += 1
+            if defer:
+                self._deferred[futures[future]] = future
+                log('enrichment.deferred', "Budget du cycle dépassé, publication reportée au prochain cycle", level='warning', key=futures[future])
+            else:
+                log('enrichment.late', "Budget du cycle dépassé, publication sans enrichissement", level='warning', key=futures[future])
+                yield futures[future], None
+
+    def submit(self, func, *args):
+        """Lance une tâche de fond hors budget du cycle (ex : édition d'une publication)."""
+        return self._executor.submit(func, *args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MatchEnrichmentCache:
+    """
+    Pages de match analysées (buteur, tirs au but, statistiques), gardées par `data-matchid`
+    pendant `ttl` secondes. Une entrée relevée à un autre score est considérée périmée :
+    un nouveau but doit refaire la récupération pour connaître le buteur.
+    """
+
+    def __init__(self, load_page, ttl=300):
+        self._load_page = load_page
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = defaultdict(threading.Lock)
+        self._key_users = defaultdict(int)  # appels qui tiennent ou attendent le verrou du match
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(score):
+        return score.replace(" ", "") if score else None
+
+    def _lookup(self, match_id, score):
+        entry = self._entries.get(match_id)
+        if entry is None:
+            return None
+        expires_at, entry_score, page = entry
+        if expires_at < time.monotonic() or (score is not None and entry_score != score):
+            return None
+        return page
+
+    def get(self, match_id, match_url, score=None):
+        """Retourne la page du match, en ne la récupérant qu'une fois par score et par TTL."""
+        if not match_url:
+            return None
+        match_id = match_id or match_url
+        score = self._normalize(score)
+        with self._lock:
+            key_lock = self._key_locks[match_id]
+            self._key_users[match_id] += 1
+        try:
+            # Un seul chargement à la fois par match : les autres appels attendent et réutilisent l'entrée
+            with key_lock:
+                if (page := self._lookup(match_id, score)) is not None:
+                    self.hits += 1
+                    return page
+                self.misses += 1
+                page = self._load_page(match_url, score)
+                if page is not None:
+                    with self._lock:
+                        self._entries[match_id] = (time.monotonic() + self.ttl, score, page)
+                        self._prune()
+                return page
+        finally:
+            with self._lock:
+                self._key_users[match_id] -= 1
+                if not self._key_users[match_id]:
+                    del self._key_users[match_id]
+
+    def _prune(self):
+        # Appelé sous self._lock ; le verrou d'un match n'est retiré que si aucun appel ne le tient ni ne l'attend,
+        # sinon un appel suivant en créerait un second et deux chargements du même match tourneraient ensemble
+        now = time.monotonic()
+        for match_id in [k for k, (expires_at, _, _) in self._entries.items() if expires_at < now]:
+            del self._entries[match_id]
+            if not self._key_users.get(match_id):
+                self._key_locks.pop(match_id, None)
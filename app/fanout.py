@@ -0,0 +1,219 @@
+# app/fanout.py
+# Diffusion d'un message vers les pages Facebook : pool de workers borné, limites de débit
+# par page et pour l'application, connexions HTTP keep-alive partagées.
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, NamedTuple, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PageTarget(NamedTuple):
+    """Colonnes d'une FacebookPage copiées avant l'envoi : les workers ne touchent pas à la session ORM."""
+    page_id: str
+    page_name: str
+    encrypted_token: str
+
+
+class Delivery(NamedTuple):
+    target: Any
+    result: Any
+    error: Optional[Exception]
+    latency: float  # secondes depuis le début de la diffusion
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons par seconde, au plus `capacity` d'avance."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Le jeton est pris tout de suite ; un solde négatif indique l'attente nécessaire
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def _refund(self):
+        with self._lock:
+            self._tokens += 1
+
+    def acquire(self, max_wait=None):
+        """Attend un jeton ; retourne False si l'attente dépasserait `max_wait` secondes."""
+        wait = self._reserve()
+        if max_wait is not None and wait > max_wait:
+            self._refund()
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def latency_report(deliveries):
+    latencies = [d.latency for d in deliveries]
+    return {
+        'count': len(deliveries),
+        'failed': sum(1 for d in deliveries if d.error is not None),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def usage_percent(header_value):
+    """
+    Pourcentage d'utilisation le plus élevé d'un en-tête X-App-Usage ou X-Page-Usage
+    (ex : {"call_count": 28, "total_time": 25, "total_cputime": 12}), ou None s'il est illisible.
+    """
+    try:
+        data = json.loads(header_value)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    values = [v for k, v in data.items() if k in ('call_count', 'total_time', 'total_cputime') and isinstance(v, (int, float))]
+    return max(values) if values else None
+
+
+def usage_factor(percent, slowdown_percent=50, floor=0.05):
+    """Débit conservé : 100 % sous le seuil, puis décroissance linéaire jusqu'à `floor` à 100 % d'utilisation."""
+    if percent is None or percent <= slowdown_percent:
+        return 1.0
+    return max(floor, 1.0 - (percent - slowdown_percent) / (100 - slowdown_percent))
+
+
+def page_from_url(url):
+    """ID de la page d'un appel Graph (/v2.8/{page}/feed ou /v2.8/{page}_{post}), None pour une requête groupée."""
+    parts = urlparse(url).path.strip('/').split('/')
+    return parts[1].split('_')[0] if len(parts) > 1 and parts[1] else None
+
+
+class FanoutEngine:
+    """
+    Envoie un même appel à chaque page en parallèle. Chaque envoi prend un jeton dans le seau
+    de sa page puis dans celui de l'application ; une page qui ferait attendre plus de
+    `max_wait` secondes est marquée en échec (RateLimited) plutôt que de bloquer un worker.
+    Les débits sont réduits d'après les en-têtes X-App-Usage et X-Page-Usage des réponses Graph
+    au-delà de `usage_slowdown_percent` % d'utilisation.
+    """
+
+    def __init__(self, max_workers=16, page_rate=0.5, page_burst=3, app_rate=50, app_burst=50, max_wait=30, usage_slowdown_percent=50):
+        self.session = requests.Session()
+        self.session.hooks['response'].append(self._observe_usage)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout')
+        self.page_rate = page_rate
+        self.page_burst = page_burst
+        self.max_wait = max_wait
+        self.app_rate = app_rate
+        self.usage_slowdown_percent = usage_slowdown_percent
+        self.app_usage = None
+        self._app_bucket = TokenBucket(app_rate, app_burst)
+        self._page_buckets = {}
+        self._lock = threading.Lock()
+
+    def _observe_usage(self, response, *args, **kwargs):
+        app_usage = usage_percent(response.headers.get('X-App-Usage'))
+        if app_usage is not None:
+            self.app_usage = app_usage
+            self._app_bucket.rate = self.app_rate * usage_factor(app_usage, self.usage_slowdown_percent)
+        page_usage = usage_percent(response.headers.get('X-Page-Usage'))
+        page_id = page_from_url(response.request.url) if page_usage is not None else None
+        if page_id:
+            self._page_bucket(page_id).rate = self.page_rate * usage_factor(page_usage, self.usage_slowdown_percent)
+        return response
+
+    def _page_bucket(self, key):
+        with self._lock:
+            if key not in self._page_buckets:
+                self._page_buckets[key] = TokenBucket(self.page_rate, self.page_burst)
+            return self._page_buckets[key]
+
+    def _acquire(self, key):
+        """Prend un jeton de la page puis de l'application ; retourne None, ou le motif du refus."""
+        page_bucket = self._page_bucket(key)
+        if not page_bucket.acquire(self.max_wait):
+            return f"limite de débit de la page {key}"
+        if not self._app_bucket.acquire(self.max_wait):
+            # Aucun appel n'est parti : le jeton de la page lui est rendu
+            page_bucket._refund()
+            return "limite de débit de l'application"
+        return None
+
+    def _deliver(self, target, send, key, started):
+        if refused := self._acquire(key):
+            raise RateLimited(refused)
+        return send(target, self.session), time.monotonic() - started
+
+    def broadcast(self, targets, send, key):
+        """
+        Appelle `send(cible, session)` pour chaque cible ; `key(cible)` désigne le seau de la page.
+        Retourne les `Delivery` dans l'ordre d'arrivée.
+        """
+        started = time.monotonic()
+        futures = {self._executor.submit(self._deliver, target, send, key(target), started): target for target in targets}
+        deliveries = []
+        for future in as_completed(futures):
+            try:
+                result, latency = future.result()
+                deliveries.append(Delivery(futures[future], result, None, latency))
+            except Exception as e:
+                deliveries.append(Delivery(futures[future], None, e, time.monotonic() - started))
+        return deliveries
+
+    def _deliver_batch(self, batch, send_batch, key, started):
+        allowed, limited = [], []
+        for target in batch:
+            if self._acquire(key(target)) is None:
+                allowed.append(target)
+            else:
+                limited.append(target)
+        results = send_batch(allowed, self.session) if allowed else []
+        latency = time.monotonic() - started
+        deliveries = [Delivery(target, result, error, latency) for target, (result, error) in zip(allowed, results)]
+        return deliveries + [Delivery(target, None, RateLimited(f"limite de débit pour {key(target)}"), latency) for target in limited]
+
+    def broadcast_batched(self, targets, send_batch, key, batch_size=50):
+        """
+        Variante groupée : `send_batch(cibles, session)` reçoit jusqu'à `batch_size` cibles et
+        retourne une liste alignée de (résultat, erreur). Les jetons de débit restent pris par page.
+        """
+        started = time.monotonic()
+        batches = [targets[i:i + batch_size] for i in range(0, len(targets), batch_size)]
+        futures = {self._executor.submit(self._deliver_batch, batch, send_batch, key, started): batch for batch in batches}
+        deliveries = []
+        for future in as_completed(futures):
+            try:
+                deliveries.extend(future.result())
+            except Exception as e:
+                latency = time.monotonic() - started
+                deliveries.extend(Delivery(target, None, e, latency) for target in futures[future])
+        return deliveries
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
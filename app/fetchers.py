@@ -0,0 +1,176 @@
+# app/fetchers.py
+# Couche de récupération des pages matchendirect : HTTP simple par défaut, Selenium en secours.
+
+import hashlib
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from app.metrics import log
+from app.parsers import has_selector
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Renvoyé à la place du HTML quand le serveur répond 304 à une requête conditionnelle
+NOT_MODIFIED = object()
+
+
+class HttpFetcher:
+    """Requêtes HTTP simples sur une session keep-alive partagée (pool de connexions)."""
+
+    def __init__(self, pool_size=10, timeout=10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'fr-FR,fr;q=0.9'})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._validators = {}
+
+    def fetch(self, url, selector=None, wait=None, conditional=False):
+        headers = {}
+        if conditional and (validators := self._validators.get(url)):
+            etag, last_modified = validators
+            if etag: headers['If-None-Match'] = etag
+            if last_modified: headers['If-Modified-Since'] = last_modified
+        response = self.session.get(url, timeout=self.timeout, headers=headers)
+        if response.status_code == 304:
+            return NOT_MODIFIED
+        response.raise_for_status()
+        if conditional:
+            self._validators[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
+
+    def forget(self, url):
+        self._validators.pop(url, None)
+
+
+class SeleniumFetcher:
+    """Charge la page dans un navigateur emprunté au pool et attend le sélecteur attendu."""
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def fetch(self, url, selector=None, wait=10, conditional=False):
+        driver = self._acquire()
+        if not driver:
+            return None
+        try:
+            driver.get(url)
+            if selector:
+                WebDriverWait(driver, wait).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            return driver.page_source
+        except Exception as e:
+            log('fetch.selenium_failed', "Page non chargée par Selenium", level='error', url=url, error=str(e))
+            return None
+        finally:
+            self._release(driver)
+
+
+class FallbackFetcher:
+    """
+    Essaie d'abord le HTTP simple. Si la requête échoue ou si le sélecteur attendu est
+    absent du HTML brut (contenu rendu en JavaScript), la page est rechargée avec Selenium.
+    """
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.http_hits = 0
+        self.http_seconds = 0.0
+        self.fallbacks = 0
+        self._cycle_mark = (0, 0.0, 0)
+
+    def fetch(self, url, selector=None, wait=10, conditional=False):
+        start = time.perf_counter()
+        try:
+            html = self.primary.fetch(url, conditional=conditional)
+        except Exception as e:
+            log('fetch.http_failed', "Échec de la requête HTTP", level='warning', url=url, error=str(e))
+            html = None
+        if html is NOT_MODIFIED:
+            self.http_hits += 1
+            self.http_seconds += time.perf_counter() - start
+            return html
+        if html and (not selector or has_selector(html, selector)):
+            self.http_hits += 1
+            self.http_seconds += time.perf_counter() - start
+            return html
+        self.fallbacks += 1
+        # Les validateurs décrivent un corps HTTP inutilisable : un 304 au cycle suivant
+        # ferait croire la page inchangée alors que seule la version Selenium fait foi
+        self.primary.forget(url)
+        log('fetch.fallback', "Sélecteur absent du HTML brut, passage par Selenium", url=url, selector=selector)
+        return self.fallback.fetch(url, selector, wait)
+
+    def forget(self, url):
+        self.primary.forget(url)
+
+    def cycle_report(self):
+        last_hits, last_seconds, last_fallbacks = self._cycle_mark
+        hits = self.http_hits - last_hits
+        seconds = self.http_seconds - last_seconds
+        self._cycle_mark = (self.http_hits, self.http_seconds, self.fallbacks)
+        return {
+            'http': hits,
+            'avg_http_ms': seconds / hits * 1000 if hits else 0.0,
+            'selenium': self.fallbacks - last_fallbacks,
+        }
+
+
+def page_fragment(html, marker='class="lm'):
+    """
+    Portion utile d'une page de scores : des premières aux dernières lignes de match.
+    Les publicités, horodatages et scripts autour du tableau n'entrent pas dans l'empreinte.
+    """
+    first = html.find(marker)
+    if first == -1:
+        return html
+    end = html.find('</tr>', html.rfind(marker))
+    return html[first:end if end != -1 else len(html)]
+
+
+class PageChangeTracker:
+    """
+    Mémorise l'empreinte du fragment utile de la dernière version traitée de chaque page,
+    pour sauter l'analyse quand rien n'a changé d'un cycle à l'autre.
+    """
+
+    def __init__(self):
+        self._processed = {}
+        self.checks = 0
+        self.skips = 0
+
+    @staticmethod
+    def fingerprint(html):
+        return hashlib.blake2b(page_fragment(html).encode('utf-8'), digest_size=16).hexdigest()
+
+    def is_unchanged(self, url, html):
+        """Retourne (inchangée, empreinte). Une réponse 304 compte comme inchangée."""
+        self.checks += 1
+        fingerprint = None if html is NOT_MODIFIED else self.fingerprint(html)
+        if html is NOT_MODIFIED or self._processed.get(url) == fingerprint:
+            self.skips += 1
+            return True, fingerprint
+        return False, fingerprint
+
+    def mark_processed(self, url, fingerprint):
+        self._processed[url] = fingerprint
+
+    def forget(self, url):
+        self._processed.pop(url, None)
+
+    @property
+    def skip_rate(self):
+        return self.skips / self.checks if self.checks else 0.0
+
+
+def build_fetcher(mode, acquire, release, pool_size=10):
+    """Construit la couche de récupération selon SCRAPER_FETCH_MODE ('http' ou 'selenium')."""
+    browser = SeleniumFetcher(acquire, release)
+    if mode == 'selenium':
+        return browser
+    return FallbackFetcher(HttpFetcher(pool_size=pool_size), browser)
@@ -0,0 +1,132 @@
+# app/graph_batch.py
+# Publications Graph API : appel individuel ou requête groupée (jusqu'à 50 opérations,
+# chacune avec le jeton de sa page), avec lecture du résultat de chaque opération.
+
+import json
+from urllib.parse import urlencode
+import facebook
+import requests
+from facebook import GraphAPIError
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from app.metrics import log
+
+MAX_BATCH_SIZE = 50
+
+
+class GraphBatchError(Exception):
+    pass
+
+
+def publish_single(graph, page_id, message, post_id=None):
+    """Publie sur le fil de la page, ou édite `post_id`. Retourne l'ID Graph de la publication."""
+    if post_id:
+        graph.request(f"{graph.version}/{post_id}", post_args={'message': message})
+        return post_id
+    return graph.put_object(parent_object=page_id, connection_name="feed", message=message).get('id')
+
+
+def batch_operation(page_id, access_token, message, post_id=None):
+    return {
+        'method': 'POST',
+        'relative_url': post_id or f"{page_id}/feed",
+        'body': urlencode({'message': message, 'access_token': access_token}),
+    }
+
+
+def _item_result(item):
+    if item is None:
+        return None, GraphBatchError("opération sans réponse (délai de traitement dépassé)")
+    try:
+        body = json.loads(item.get('body') or 'null')
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and body.get('error'):
+        return None, GraphAPIError(body)
+    if item.get('code') != 200:
+        return None, GraphBatchError(f"code HTTP {item.get('code')}")
+    return body, None
+
+
+def send_batch(session, base_url, version, operations, access_token, timeout=60):
+    """
+    Envoie les opérations en une requête authentifiée par `access_token` (chaque opération
+    porte en plus le jeton de sa page). Retourne une liste alignée de (corps JSON, erreur).
+    Une erreur sur la requête entière (réseau, jeton principal refusé) est levée.
+    """
+    if len(operations) > MAX_BATCH_SIZE:
+        raise ValueError(f"au plus {MAX_BATCH_SIZE} opérations par requête groupée")
+    response = session.post(f"{base_url.rstrip('/')}/{version}/",
+                            data={'access_token': access_token, 'batch': json.dumps(operations), 'include_headers': 'false'},
+                            timeout=timeout)
+    payload = response.json()
+    if isinstance(payload, dict) and payload.get('error'):
+        raise GraphAPIError(payload)
+    if not isinstance(payload, list) or len(payload) != len(operations):
+        raise GraphBatchError("réponse groupée inattendue")
+    return [_item_result(item) for item in payload]
+
+
+def batch_not_processed(error):
+    """
+    Vrai si l'échec de la requête groupée garantit qu'aucune opération n'a été traitée : connexion
+    impossible avant l'envoi, ou objet d'erreur Graph pour la requête entière. Un délai de lecture ou
+    une réponse illisible peuvent arriver après le traitement du lot par Graph.
+    """
+    if isinstance(error, GraphAPIError) or isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', error.args[0]) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    return False
+
+
+def post_id_from(body, post_id=None):
+    return post_id or (body.get('id') if isinstance(body, dict) else None)
+
+
+def set_graph_base(base_url):
+    """Redirige aussi les appels individuels de facebook-sdk (ex : serveur Graph de test local)."""
+    facebook.FACEBOOK_GRAPH_URL = base_url.rstrip('/') + '/'
+
+
+def make_senders(page_clients, message, base_url):
+    """
+    Fonctions d'envoi d'un message vers des cibles (clé, PageTarget, ID du post à éditer ou None),
+    pour FanoutEngine.broadcast et FanoutEngine.broadcast_batched. En mode groupé, une opération
+    refusée par Graph (ou toute la requête, si elle n'a pas pu être traitée) est retentée par un appel
+    individuel ; une issue incertaine est laissée aux reprises de la file d'envoi, sans double publication immédiate.
+    """
+    def send(target, session):
+        _, page, post_id = target
+        _, graph = page_clients.get(page.page_id, page.encrypted_token)
+        return publish_single(graph, page.page_id, message, post_id)
+
+    def send_grouped(batch, session):
+        clients = [page_clients.get(page.page_id, page.encrypted_token) for _, page, _ in batch]
+        operations = [batch_operation(page.page_id, token, message, post_id) for (_, page, post_id), (token, _) in zip(batch, clients)]
+        try:
+            results = send_batch(session, base_url, clients[0][1].version, operations, clients[0][0])
+        except Exception as e:
+            if not batch_not_processed(e):
+                log('graph_batch.outcome_unknown', "Issue de la requête groupée inconnue, envois laissés aux reprises de la file",
+                    level='warning', deliveries=len(batch), error=str(e))
+                return [(None, e)] * len(batch)
+            log('graph_batch.fallback', "Requête groupée non traitée, repli sur des appels individuels",
+                level='warning', deliveries=len(batch), error=str(e))
+            results = [(None, e)] * len(batch)
+        outcomes = []
+        for (_, page, post_id), (_, graph), (body, error) in zip(batch, clients, results):
+            if error is None:
+                outcomes.append((post_id_from(body, post_id), None))
+                continue
+            if not isinstance(error, GraphAPIError) and not batch_not_processed(error):
+                # Opération sans réponse ou au code inattendu : elle a peut-être été publiée
+                outcomes.append((None, error))
+                continue
+            try:
+                outcomes.append((publish_single(graph, page.page_id, message, post_id), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    return send, send_grouped
@@ -0,0 +1,155 @@
+# app/leader.py
+# Bail de leader en base (ligne GlobalState mise à jour par comparaison-échange) : un seul
+# worker scrape et publie, les autres restent en attente et reprennent le bail à son expiration.
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app.models import GlobalState
+from app.metrics import metrics
+
+SCRAPER_LEASE_KEY = 'scraper_leader_lease'
+
+
+def worker_identity():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _parse(raw):
+    try:
+        lease = json.loads(raw) if raw else None
+    except ValueError:
+        return None
+    if not isinstance(lease, dict):
+        return None
+    lease['expires_at'] = datetime.fromisoformat(lease['expires_at'])
+    return lease
+
+
+def _dump(lease):
+    return json.dumps({**lease, 'expires_at': lease['expires_at'].isoformat()}, sort_keys=True)
+
+
+def lease_status(session, key=SCRAPER_LEASE_KEY):
+    """Bail tel qu'enregistré en base (titulaire, échéance, nombre de bascules), ou None."""
+    row = session.query(GlobalState.value).filter_by(key=key).first()
+    return _parse(row[0]) if row else None
+
+
+class LeaderLease:
+    """
+    `heartbeat(session)` prend le bail s'il est libre ou expiré, ou le prolonge s'il est déjà à ce
+    worker ; l'écriture ne réussit que si la ligne n'a pas changé depuis sa lecture. Le bail est
+    tenu localement un peu moins longtemps qu'en base, pour qu'un ancien leader s'arrête avant
+    qu'un autre ne puisse le reprendre.
+    """
+
+    def __init__(self, holder, key=SCRAPER_LEASE_KEY, lease_seconds=30):
+        self.holder = holder
+        self.key = key
+        self.lease_seconds = lease_seconds
+        self._held_until = 0.0
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.takeovers = 0
+        self.losses = 0
+        self.last_takeover_seconds = None
+        self.max_takeover_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def is_leader(self):
+        return time.monotonic() < self._held_until
+
+    def _lost(self, was_leader, reason):
+        if was_leader:
+            self.losses += 1
+            metrics.inc('leader_lost_renewals_total', reason=reason)
+        self._held_until = 0.0
+        metrics.set('leader_is_leader', 0)
+
+    def _write(self, session, old_raw, lease):
+        new_raw = _dump(lease)
+        if old_raw is None:
+            session.add(GlobalState(key=self.key, value=new_raw))
+            try:
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()
+                return False
+        result = session.execute(update(GlobalState)
+                                 .where(GlobalState.key == self.key, GlobalState.value == old_raw)
+                                 .values(value=new_raw))
+        session.commit()
+        return result.rowcount == 1
+
+    def heartbeat(self, session, now=None):
+        """Retourne True si ce worker est leader jusqu'au prochain battement."""
+        now = now or datetime.utcnow()
+        started = time.monotonic()
+        with self._lock:
+            was_leader = self.is_leader()
+            row = session.query(GlobalState.value).filter_by(key=self.key).first()
+            old_raw = row[0] if row else None
+            current = _parse(old_raw)
+            if current is not None:
+                metrics.set('leader_epoch', current.get('epoch', 0))
+            expires_at = now + timedelta(seconds=self.lease_seconds)
+            if current is not None and current['holder'] == self.holder:
+                lease = {**current, 'expires_at': expires_at}
+            elif current is None or current['expires_at'] <= now:
+                # Bail libre ou expiré : reprise, comptée comme bascule s'il avait un titulaire
+                gap = (now - current['expires_at']).total_seconds() if current else None
+                lease = {'holder': self.holder, 'expires_at': expires_at, 'acquired_at': now.isoformat(),
+                         'epoch': (current['epoch'] + 1) if current else 1,
+                         'last_takeover_seconds': gap if gap is not None else (current or {}).get('last_takeover_seconds')}
+            else:
+                self._lost(was_leader, 'taken')
+                return False
+            if not self._write(session, old_raw, lease):
+                self._lost(was_leader, 'conflict')
+                return False
+            self._held_until = started + self.lease_seconds * 0.8
+            metrics.set('leader_is_leader', 1)
+            metrics.set('leader_epoch', lease['epoch'])
+            if current is None or current['holder'] != self.holder:
+                self.acquisitions += 1
+                metrics.inc('leader_acquisitions_total')
+                if current is not None:
+                    self.takeovers += 1
+                    metrics.inc('leader_takeovers_total')
+                    self.last_takeover_seconds = lease['last_takeover_seconds']
+                    self.max_takeover_seconds = max(self.max_takeover_seconds, self.last_takeover_seconds)
+            return True
+
+    def release(self, session, now=None):
+        """Rend le bail (arrêt propre) : un autre worker peut le reprendre dès son prochain battement."""
+        with self._lock:
+            if not self.is_leader():
+                return False
+            self._held_until = 0.0
+            metrics.set('leader_is_leader', 0)
+            row = session.query(GlobalState.value).filter_by(key=self.key).first()
+            current = _parse(row[0]) if row else None
+            if current is None or current['holder'] != self.holder:
+                return False
+            return self._write(session, row[0], {**current, 'expires_at': now or datetime.utcnow()})
+
+    def report(self):
+        # Au moins une heure au dénominateur : un démarrage n'apparaît pas comme une rafale de bascules
+        hours = max((time.monotonic() - self.started_at) / 3600, 1.0)
+        return {
+            'leader': self.is_leader(),
+            'acquisitions': self.acquisitions,
+            'takeovers': self.takeovers,
+            'losses': self.losses,
+            'churn_per_hour': (self.acquisitions + self.losses) / hours,
+            'last_takeover_seconds': self.last_takeover_seconds,
+            'max_takeover_seconds': self.max_takeover_seconds,
+        }
@@ -0,0 +1,200 @@
+# app/match_state.py
+# État des matchs en direct gardé en mémoire par le worker, et détection des événements.
+# La base (GlobalMatchState) ne reçoit que des instantanés écrits après coup.
+
+import re
+import time
+from typing import NamedTuple, Optional
+from app.parsers import LiveScore
+from app.models import GlobalMatchState
+from app.bulk import upsert, delete_in
+
+KICKOFF = 'kickoff'
+GOAL = 'goal'
+DISALLOWED_GOAL = 'disallowed_goal'
+HALF_TIME = 'half_time'
+FULL_TIME = 'full_time'
+
+
+class MatchEvent(NamedTuple):
+    kind: str
+    match: LiveScore
+    team: Optional[str] = None  # équipe qui a marqué (GOAL)
+
+
+def state_key(match):
+    """Clé stable d'un match : son `data-matchid`, ou « eq1 vs eq2 » quand la page ne le donne pas."""
+    return match.match_id or match.key
+
+
+def parse_score(score):
+    """'2 - 1' -> (2, 1) ; None avant le coup d'envoi ou si le score est illisible."""
+    try:
+        s1, s2 = score.replace(" ", "").split("-")
+        return int(s1), int(s2)
+    except (ValueError, AttributeError):
+        return None
+
+
+_KICKOFF_TIME = re.compile(r"^\d{1,2}[:h]\d{2}$")
+
+
+def _pre_match(minute, score):
+    """
+    Match pas encore commencé : pas de score, ou la colonne minute vide ou à l'heure du coup d'envoi.
+    Les pauses en cours de match (« Pause », « Prol. ») ne comptent pas : le match est déjà engagé.
+    """
+    minute = (minute or "").strip()
+    return parse_score(score) is None or not minute or bool(_KICKOFF_TIME.match(minute))
+
+
+class MatchRecord:
+    __slots__ = ('match_id', 'eq1', 'eq2', 'score', 'minute', 'statut', 'url')
+
+    def __init__(self, match_id, eq1, eq2, score, minute, statut, url):
+        self.match_id = match_id
+        self.eq1 = eq1
+        self.eq2 = eq2
+        self.score = score
+        self.minute = minute
+        self.statut = statut
+        self.url = url
+
+    @classmethod
+    def from_live(cls, match):
+        return cls(match.match_id, match.eq1, match.eq2, match.score, match.minute, match.statut, match.url)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(None, row.eq1, row.eq2, row.score, row.minute or "", row.statut or "", row.url)
+
+    def update(self, match):
+        """Recopie l'état relevé ; retourne True si un champ a changé."""
+        changed = False
+        for field in self.__slots__:
+            value = getattr(match, field)
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+        return changed
+
+
+def detect_events(old, new):
+    """
+    Compare l'état connu d'un match (`MatchRecord` ou None) à la ligne relevée (`LiveScore`)
+    et retourne la liste des événements. Fonction pure : aucune lecture ni écriture d'état.
+    Comme auparavant, la mi-temps l'emporte sur un changement de score relevé au même cycle.
+    """
+    if old is None or _pre_match(old.minute, old.score):
+        # Match découvert en cours de jeu, ou qui vient de commencer
+        if new.score.replace(" ", "") != "-" and "'" in new.minute:
+            return [MatchEvent(KICKOFF, new)]
+        return []
+    if new.statut == "MT" and old.statut != "MT":
+        return [MatchEvent(HALF_TIME, new)]
+    events = []
+    old_score, new_score = parse_score(old.score), parse_score(new.score)
+    if new.score != old.score and old_score is not None and new_score is not None:
+        (s1_old, s2_old), (s1_new, s2_new) = old_score, new_score
+        if s1_new > s1_old or s2_new > s2_old:
+            events.append(MatchEvent(GOAL, new, new.eq1 if s1_new > s1_old else new.eq2))
+        elif s1_new < s1_old or s2_new < s2_old:
+            events.append(MatchEvent(DISALLOWED_GOAL, new))
+    if new.statut == "TER" and old.statut != "TER":
+        events.append(MatchEvent(FULL_TIME, new))
+    return events
+
+
+class MatchStateStore:
+    """
+    Derniers états connus des matchs en direct, indexés par `state_key`.
+    Les clés modifiées ou disparues sont notées pour le prochain instantané en base.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._dirty = set()
+        self._removed = set()
+        self.loaded = False
+        self.last_flush = 0.0
+
+    def load(self, rows):
+        """Reprend l'état enregistré en base (au démarrage du worker)."""
+        self._records = {row.match_key: MatchRecord.from_row(row) for row in rows}
+        self.loaded = True
+        self.last_flush = time.monotonic()
+
+    def _find(self, match):
+        key = state_key(match)
+        if key in self._records:
+            return key, self._records[key]
+        # Lignes écrites avant l'indexation par ID : elles portent la clé « eq1 vs eq2 »
+        if match.key in self._records:
+            return match.key, self._records[match.key]
+        return key, None
+
+    def apply(self, live_scores):
+        """
+        Met à jour l'état à partir des matchs relevés et retourne les événements détectés.
+        Un relevé vide est traité comme un échec de scraping : l'état est gardé tel quel,
+        sans quoi tous les matchs suivis seraient supprimés puis republiés en coups d'envoi.
+        """
+        live_scores = list(live_scores)
+        if not live_scores:
+            return []
+        events, seen = [], set()
+        for match in live_scores:
+            found_key, record = self._find(match)
+            key = state_key(match)
+            events.extend(detect_events(record, match))
+            if record is None:
+                self._records[key] = MatchRecord.from_live(match)
+                self._dirty.add(key)
+            else:
+                if found_key != key:
+                    del self._records[found_key]
+                    self._removed.add(found_key)
+                    self._records[key] = record
+                    self._dirty.add(key)
+                if record.update(match):
+                    self._dirty.add(key)
+            seen.add(key)
+        for key in [k for k in self._records if k not in seen]:
+            del self._records[key]
+            self._dirty.discard(key)
+            self._removed.add(key)
+        return events
+
+    def records(self):
+        return dict(self._records)
+
+    @property
+    def pending(self):
+        return bool(self._dirty or self._removed)
+
+    def take_snapshot(self):
+        """Retourne (enregistrements modifiés par clé, clés disparues) et vide la liste d'attente."""
+        changed = {key: self._records[key] for key in self._dirty if key in self._records}
+        removed = self._removed - set(changed)
+        self._dirty, self._removed = set(), set()
+        self.last_flush = time.monotonic()
+        return changed, removed
+
+    def requeue(self, changed, removed):
+        """Remet en attente un instantané dont l'écriture a échoué."""
+        self._dirty |= set(changed) & set(self._records)
+        self._removed |= set(removed) - set(self._records)
+
+
+def save_snapshot(session, changed, removed):
+    """
+    Écrit un instantané en base : un DELETE pour les matchs disparus et un upsert
+    multi-lignes sur `match_key` pour les matchs modifiés. Retourne le nombre d'instructions.
+    Le commit reste à la charge de l'appelant.
+    """
+    statements = delete_in(session, GlobalMatchState, 'match_key', removed)
+    rows = [
+        {'match_key': key, 'score': r.score, 'statut': r.statut, 'minute': r.minute, 'url': r.url, 'eq1': r.eq1, 'eq2': r.eq2}
+        for key, r in changed.items()
+    ]
+    return statements + upsert(session, GlobalMatchState, rows, 'match_key')
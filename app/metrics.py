@@ -0,0 +1,154 @@
+# app/metrics.py
+# Mesures du worker : durées des phases (spans), compteurs et jauges, exportés au format texte
+# Prometheus sur /metrics, et journaux structurés (une ligne JSON par événement).
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PREFIX = 'footbot'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+HELP = {
+    'phase_seconds': "Durée des phases du cycle des scores, du résumé et de la diffusion.",
+    'errors_total': "Erreurs par phase.",
+    'cycles_total': "Cycles exécutés par tâche.",
+    'cycles_skipped_total': "Déclenchements ignorés car le cycle précédent tournait encore.",
+    'poll_interval_seconds': "Intervalle actuel entre deux cycles des scores.",
+    'matches_live': "Matchs en direct vus au dernier cycle.",
+    'matches_finished_total': "Matchs terminés à publier trouvés.",
+    'events_total': "Événements de match détectés, par type.",
+    'enrichment_misses_total': "Pages de match sans le contenu attendu (page, statistiques, buteur).",
+    'leader_acquisitions_total': "Prises du bail de scraping par ce worker.",
+    'leader_takeovers_total': "Reprises d'un bail de scraping expiré laissé par un autre worker.",
+    'leader_lost_renewals_total': "Bails de scraping perdus par ce worker, par cause (taken, conflict, error).",
+    'leader_epoch': "Époque du bail de scraping (incrémentée à chaque changement de titulaire).",
+    'leader_is_leader': "1 si ce worker tient le bail de scraping.",
+    'posts_total': "Messages mis en file d'envoi.",
+    'deliveries_total': "Publications sur les pages, par issue.",
+}
+
+
+def log(event, msg=None, level='info', **fields):
+    """Journal structuré : une ligne JSON lisible par les outils de recherche de logs."""
+    record = {'ts': datetime.utcnow().isoformat(timespec='milliseconds') + 'Z', 'level': level, 'event': event}
+    if msg is not None:
+        record['msg'] = msg
+    record.update(fields)
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """Registre en mémoire d'un processus ; `snapshot()` en donne une copie transmissible à un autre processus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def error(self, phase, exc=None, **labels):
+        """
+        Compte une erreur dans errors_total ; une exception déjà comptée par une phase intérieure
+        ne l'est pas une seconde fois par le bloc qui la rattrape. Renvoie True si elle a été comptée.
+        """
+        if exc is not None:
+            if getattr(exc, '_footbot_counted', False):
+                return False
+            try:
+                exc._footbot_counted = True
+            except AttributeError:
+                pass
+        self.inc('errors_total', phase=phase, **labels)
+        return True
+
+    @contextmanager
+    def span(self, phase, **labels):
+        """Chronomètre une phase ; une exception est comptée dans errors_total (une seule fois) puis propagée."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(phase, e, **labels)
+            raise
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start, phase=phase, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets': self.buckets,
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': {key: [list(h[0]), h[1], h[2]] for key, h in self._histograms.items()},
+            }
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def render(snapshots):
+    """
+    Texte d'exposition Prometheus pour une liste de (étiquettes communes, instantané) :
+    une famille de mesures n'est décrite qu'une fois même si plusieurs processus l'alimentent.
+    """
+    families = {}
+    for common, snapshot in snapshots:
+        extra = _labels(common)
+        for kind in ('counters', 'gauges'):
+            for (name, labels), value in snapshot[kind].items():
+                families.setdefault((name, 'counter' if kind == 'counters' else 'gauge'), []).append((extra + labels, value))
+        for (name, labels), (counts, total, count) in snapshot['histograms'].items():
+            families.setdefault((name, 'histogram'), []).append((extra + labels, (snapshot['buckets'], counts, total, count)))
+    lines = []
+    for (name, kind), samples in sorted(families.items()):
+        full = f"{PREFIX}_{name}"
+        if name in HELP:
+            lines.append(f"# HELP {full} {HELP[name]}")
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in samples:
+            if kind != 'histogram':
+                lines.append(f"{full}{_format_labels(labels)} {value}")
+                continue
+            buckets, counts, total, count = value
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f"{full}_bucket{_format_labels(labels + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{full}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{full}_count{_format_labels(labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -121,4 +121,55 @@ class GlobalPublishedMatch(db.Model):
     __tablename__ = 'global_published_match'
     id = db.Column(db.Integer, primary_key=True)
     match_identifier = db.Column(db.String(255), unique=True, nullable=False)
-    published_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    published_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+# --- FILE D'ENVOI VERS FACEBOOK (OUTBOX) ---
+
+class OutboxMessage(db.Model):
+    """Message à publier, enregistré dans la même transaction que son historique Broadcast."""
+    __tablename__ = 'outbox_message'
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=False)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcast.id'), nullable=True)
+    # Renseigné pour une édition : le message dont les publications doivent être modifiées
+    parent_id = db.Column(db.Integer, db.ForeignKey('outbox_message.id'), nullable=True, index=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    deliveries = db.relationship('OutboxDelivery', backref='message', lazy=True, cascade="all, delete-orphan")
+
+class OutboxDelivery(db.Model):
+    """Envoi d'un message à une page : pending, sent ou dead (abandonné après trop d'échecs)."""
+    __tablename__ = 'outbox_delivery'
+    __table_args__ = (db.UniqueConstraint('message_id', 'facebook_page_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    message_id = db.Column(db.Integer, db.ForeignKey('outbox_message.id'), nullable=False, index=True)
+    facebook_page_id = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_error = db.Column(db.Text, nullable=True)
+    post_id = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+class PublisherNode(db.Model):
+    """Processus publisher vivant : les pages sont réparties entre les nœuds par hachage cohérent."""
+    __tablename__ = 'publisher_node'
+    id = db.Column(db.Integer, primary_key=True)
+    node_id = db.Column(db.String(100), unique=True, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class DeliveryLog(db.Model):
+    """Une tentative de publication d'un message sur une page : issue, latence, ID Graph ou code d'erreur."""
+    __tablename__ = 'delivery_log'
+    __table_args__ = (db.Index('ix_delivery_log_page_created', 'facebook_page_id', 'created_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    # Sans clé étrangère : le journal est conservé plus longtemps que la file d'envoi
+    message_id = db.Column(db.Integer, nullable=False, index=True)
+    facebook_page_id = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    attempt = db.Column(db.Integer, nullable=False, default=1)
+    latency_ms = db.Column(db.Integer, nullable=False)
+    post_id = db.Column(db.String(100), nullable=True)
+    error_code = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,143 @@
+# app/outbox.py
+# File d'envoi durable : le scraping enregistre les messages et un envoi par page,
+# le dispatcher les publie par lots avec reprises espacées et mise à l'écart des échecs répétés.
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import OutboxMessage, OutboxDelivery
+
+PENDING = 'pending'
+SENT = 'sent'
+DEAD = 'dead'
+
+
+def idempotency_key(content, scope=None):
+    """Clé d'un message : le même texte mis en file deux fois le même jour n'est publié qu'une fois."""
+    scope = scope or datetime.utcnow().strftime('%Y-%m-%d')
+    return hashlib.sha256(f"{scope}|{content}".encode('utf-8')).hexdigest()
+
+
+def enqueue(session, content, page_ids, key, broadcast_id=None, parent_id=None):
+    """
+    Ajoute le message et un envoi par page à la session (le commit reste à l'appelant).
+    Retourne (message, créé) ; un message de même clé déjà en file est rendu tel quel.
+    """
+    existing = session.query(OutboxMessage).filter_by(idempotency_key=key).first()
+    if existing is not None:
+        return existing, False
+    message = OutboxMessage(idempotency_key=key, broadcast_id=broadcast_id, parent_id=parent_id, content=content)
+    session.add(message)
+    session.flush()
+    now = datetime.utcnow()
+    rows = [{'message_id': message.id, 'facebook_page_id': page_id, 'status': PENDING, 'attempts': 0,
+             'next_attempt_at': now, 'created_at': now} for page_id in dict.fromkeys(page_ids)]
+    if rows:
+        session.execute(OutboxDelivery.__table__.insert(), rows)
+    return message, True
+
+
+def due_page_ids(session):
+    """Pages ayant au moins un envoi arrivé à échéance."""
+    now = datetime.utcnow()
+    return [page_id for (page_id,) in session.query(OutboxDelivery.facebook_page_id).distinct()
+            .filter(OutboxDelivery.status == PENDING, OutboxDelivery.next_attempt_at <= now)]
+
+
+def claim_due(session, limit, lease_seconds, page_ids=None):
+    """
+    Réserve jusqu'à `limit` envois arrivés à échéance, les plus anciens d'abord, limités aux pages
+    `page_ids` si elles sont données. La réservation repousse leur échéance de `lease_seconds` :
+    un envoi interrompu par un arrêt est repris ensuite.
+    """
+    now = datetime.utcnow()
+    query = session.query(OutboxDelivery).filter(OutboxDelivery.status == PENDING, OutboxDelivery.next_attempt_at <= now)
+    if page_ids is not None:
+        query = query.filter(OutboxDelivery.facebook_page_id.in_(page_ids))
+    deliveries = (query
+                  .order_by(OutboxDelivery.next_attempt_at, OutboxDelivery.id)
+                  .limit(limit)
+                  .with_for_update(skip_locked=True)
+                  .all())
+    for delivery in deliveries:
+        delivery.next_attempt_at = now + timedelta(seconds=lease_seconds)
+    session.commit()
+    return deliveries
+
+
+def backoff_seconds(attempts, base_seconds, max_seconds):
+    """Délai avant la tentative suivante : doublé à chaque échec, plafonné, avec ±20 % d'aléa."""
+    return min(max_seconds, base_seconds * 2 ** max(0, attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+def mark_sent(delivery, post_id):
+    delivery.status = SENT
+    delivery.attempts += 1
+    delivery.post_id = post_id
+    delivery.sent_at = datetime.utcnow()
+    delivery.last_error = None
+
+
+def mark_failed(delivery, error, max_attempts, base_seconds, max_seconds):
+    """Compte l'échec et replanifie l'envoi, ou le met à l'écart après `max_attempts` tentatives."""
+    delivery.attempts += 1
+    delivery.last_error = str(error)[:1000]
+    if delivery.attempts >= max_attempts:
+        delivery.status = DEAD
+    else:
+        delivery.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(delivery.attempts, base_seconds, max_seconds))
+
+
+def postpone(delivery, seconds):
+    """Replanifie l'envoi sans compter de tentative : il n'a pas atteint Graph (limite de débit locale)."""
+    delivery.next_attempt_at = datetime.utcnow() + timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def mark_dead(delivery, reason):
+    delivery.status = DEAD
+    delivery.last_error = reason
+
+
+def resolve_edit(delivery, parent):
+    """
+    ID du post à éditer pour un envoi d'édition, ou None si l'envoi ne part pas à ce passage :
+    publication d'origine en attente (replanifié sans tentative) ou inutilisable (mis à l'écart).
+    Une origine marquée publiée mais sans ID est mise à l'écart : l'appel créerait un nouveau post.
+    """
+    if parent is None or parent.status == DEAD:
+        mark_dead(delivery, "publication d'origine absente")
+        return None
+    if parent.status == PENDING:
+        delivery.next_attempt_at = parent.next_attempt_at + timedelta(seconds=1)
+        return None
+    if not parent.post_id:
+        mark_dead(delivery, "publication d'origine sans identifiant de post")
+        return None
+    return parent.post_id
+
+
+def queue_stats(session):
+    """Profondeur de la file, âge du plus ancien envoi en attente et nombre d'envois abandonnés."""
+    depth, oldest = (session.query(func.count(OutboxDelivery.id), func.min(OutboxDelivery.created_at))
+                     .filter(OutboxDelivery.status == PENDING).one())
+    dead = session.query(func.count(OutboxDelivery.id)).filter(OutboxDelivery.status == DEAD).scalar()
+    return {
+        'depth': depth or 0,
+        'oldest_age_seconds': (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+        'dead': dead or 0,
+    }
+
+
+def prune(session, retention_days):
+    """Supprime les envois terminés et les messages sans envoi en attente plus anciens que la fenêtre."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deliveries = (session.query(OutboxDelivery)
+                  .filter(OutboxDelivery.status != PENDING, OutboxDelivery.created_at < cutoff)
+                  .delete(synchronize_session=False))
+    still_pending = session.query(OutboxDelivery.message_id).filter(OutboxDelivery.status == PENDING)
+    referenced = session.query(OutboxMessage.parent_id).filter(OutboxMessage.parent_id.isnot(None))
+    messages = (session.query(OutboxMessage)
+                .filter(OutboxMessage.created_at < cutoff, OutboxMessage.id.notin_(still_pending), OutboxMessage.id.notin_(referenced))
+                .delete(synchronize_session=False))
+    return deliveries, messages
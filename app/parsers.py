@@ -0,0 +1,144 @@
+# app/parsers.py
+# Extraction des pages matchendirect avec Lexbor (selectolax, moteur HTML en C).
+# Chaque page est analysée une seule fois et réduite à des enregistrements compacts.
+
+from datetime import datetime, time as dt_time
+from typing import NamedTuple, Optional, Tuple
+from selectolax.lexbor import LexborHTMLParser
+
+BASE_URL = "https://www.matchendirect.fr"
+
+
+class LiveScore(NamedTuple):
+    match_id: Optional[str]
+    eq1: str
+    eq2: str
+    score: str
+    minute: str
+    statut: str
+    url: Optional[str]
+
+    @property
+    def key(self):
+        return f"{self.eq1} vs {self.eq2}"
+
+
+class FinishedMatch(NamedTuple):
+    match_id: str
+    eq1: str
+    eq2: str
+    score: str
+    url: Optional[str]
+
+
+class GoalEvent(NamedTuple):
+    scorer: str
+    minute: Optional[str]
+
+
+class StatLine(NamedTuple):
+    title: str
+    home: str
+    away: str
+
+
+class MatchPage(NamedTuple):
+    last_goal: Optional[GoalEvent]
+    penalties: Optional[str]
+    stats: Tuple[StatLine, ...]
+
+
+def _text(node):
+    return node.text(deep=True, separator='', strip=False).strip() if node is not None else ""
+
+
+def _row_of(node):
+    while node is not None and node.tag != 'tr':
+        node = node.parent
+    return node
+
+
+def _absolute(href):
+    return f"{BASE_URL}{href}" if href else None
+
+
+def _statut(minute):
+    minute = minute.lower()
+    return "MT" if "mi-temps" in minute else ("TER" if "ter" in minute else "")
+
+
+def parse_live_scores(html):
+    """Lignes de la page des scores en direct (`td.lm3`), dans l'ordre de la page."""
+    scores = []
+    for cell in LexborHTMLParser(html).css("td.lm3"):
+        eq1, eq2 = cell.css_first("span.lm3_eq1"), cell.css_first("span.lm3_eq2")
+        score1, score2 = cell.css_first("span.scored_1"), cell.css_first("span.scored_2")
+        if eq1 is None or eq2 is None or score1 is None or score2 is None:
+            continue
+        row = _row_of(cell)
+        minute, url, match_id = "", None, None
+        if row is not None:
+            minute = _text(row.css_first("td.lm2"))
+            link = row.css_first("a")
+            url = _absolute(link.attributes.get('href')) if link is not None else None
+            match_id = row.attributes.get('data-matchid')
+        scores.append(LiveScore(match_id, _text(eq1), _text(eq2), f"{_text(score1)} - {_text(score2)}", minute, _statut(minute), url))
+    return scores
+
+
+def parse_finished_matches(html):
+    """Lignes `tr[data-matchid]` dont le statut indique un match terminé (TER)."""
+    finished = []
+    for row in LexborHTMLParser(html).css("tr[data-matchid]"):
+        if "TER" not in _text(row.css_first("td.lm2")):
+            continue
+        eq1, eq2, score = row.css_first("span.lm3_eq1"), row.css_first("span.lm3_eq2"), row.css_first("span.lm3_score")
+        if eq1 is None or eq2 is None or score is None:
+            continue
+        link = row.css_first("a.ga4-matchdetail")
+        url = _absolute(link.attributes.get('href')) if link is not None else None
+        finished.append(FinishedMatch(row.attributes['data-matchid'], _text(eq1), _text(eq2), _text(score), url))
+    return finished
+
+
+def parse_match_page(html):
+    """Dernier buteur, score des tirs au but et statistiques d'une page de match, en une seule analyse."""
+    tree = LexborHTMLParser(html)
+
+    last_goal = None
+    goals = tree.css("span.st1.eventTypeG")
+    if goals and (row := _row_of(goals[-1])) is not None:
+        minute = row.css_first("td.c2")
+        last_goal = GoalEvent(_text(row.css_first("span.st1.eventTypeG")), _text(minute) if minute is not None else None)
+
+    penalties = None
+    if "Penalties" in html:
+        cells = [td for td in tree.css("td") if "Penalties" in td.text() and td.css_first("b") is not None]
+        if cells:
+            penalties = _text(cells[-1].css_first("b"))
+
+    stats, seen_titles = [], set()
+    for block in tree.css("div.progressBar"):
+        title, v1, v2 = block.css_first("h5.progressHeaderTitle"), block.css_first("span.progressBarValue1"), block.css_first("span.progressBarValue2")
+        if title is None or v1 is None or v2 is None:
+            continue
+        if (title_text := _text(title)) not in seen_titles:
+            seen_titles.add(title_text)
+            stats.append(StatLine(title_text, _text(v1), _text(v2)))
+
+    return MatchPage(last_goal, penalties, tuple(stats))
+
+
+def parse_fixtures(html, day, tz):
+    """Horaires de coup d'envoi (`td.lm1` au format HH:MM) des matchs listés pour la journée."""
+    kickoffs = []
+    for cell in LexborHTMLParser(html).css("tr[data-matchid] td.lm1"):
+        hours, _, minutes = _text(cell).partition(":")
+        if hours.isdigit() and minutes[:2].isdigit():
+            kickoffs.append(datetime.combine(day, dt_time(int(hours) % 24, int(minutes[:2]) % 60), tzinfo=tz))
+    return kickoffs
+
+
+def has_selector(html, selector):
+    """Indique si le HTML brut contient au moins un élément correspondant au sélecteur CSS."""
+    return LexborHTMLParser(html).css_first(selector) is not None
@@ -0,0 +1,110 @@
+# app/polling.py
+# Choix de l'intervalle entre deux cycles de scores selon l'activité des matchs et le calendrier du jour.
+
+import re
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Les horaires de matchendirect sont donnés à l'heure de Paris
+FIXTURE_TIMEZONE = ZoneInfo("Europe/Paris")
+
+_MINUTE_RE = re.compile(r"(\d+)(?:\s*\+\s*(\d+))?")
+
+
+def parse_minute(minute):
+    """'67'' -> 67, '90+3'' -> 93 ; None si la minute n'est pas un temps de jeu."""
+    if not minute or "'" not in minute:
+        return None
+    match = _MINUTE_RE.search(minute)
+    if not match:
+        return None
+    return int(match.group(1)) + int(match.group(2) or 0)
+
+
+class AdaptivePoller:
+    """
+    Décide du délai avant le prochain cycle :
+    - rapide quand un match est dans ses dernières minutes ou vient de voir un but ;
+    - normal tant qu'un match est en cours ;
+    - lent quand tous les matchs en cours sont à la mi-temps ;
+    - presque à l'arrêt quand le calendrier du jour n'annonce aucun match proche.
+    """
+
+    def __init__(self, base_seconds=8, fast_seconds=5, half_time_seconds=30, idle_seconds=600,
+                 unknown_calendar_seconds=60, kickoff_lead_minutes=5, final_minutes_from=80, recent_goal_minutes=3):
+        self.base_seconds = base_seconds
+        self.fast_seconds = fast_seconds
+        self.half_time_seconds = half_time_seconds
+        self.idle_seconds = idle_seconds
+        self.unknown_calendar_seconds = unknown_calendar_seconds
+        self.kickoff_lead = timedelta(minutes=kickoff_lead_minutes)
+        self.final_minutes_from = final_minutes_from
+        self.recent_goal_seconds = recent_goal_minutes * 60
+        self.current_interval = base_seconds
+        self.fixtures = None
+        self.fixtures_date = None
+        self._live = []
+        self._last_goal_at = 0.0
+        # Comptabilité des économies par rapport à un cycle fixe toutes les `base_seconds`
+        self.cycles = 0
+        self.baseline_cycles = 0.0
+        self.cycle_cpu_seconds = 0.0
+
+    # --- Observations ---
+
+    def set_fixtures(self, kickoffs, day):
+        self.fixtures = sorted(kickoffs)
+        self.fixtures_date = day
+
+    def needs_fixtures(self, now=None):
+        return self.fixtures_date != (now or datetime.now(FIXTURE_TIMEZONE)).date()
+
+    def observe(self, live_scores, goals=0):
+        """Enregistre l'état des matchs en direct après une analyse de la page."""
+        self._live = [(m.statut, parse_minute(m.minute)) for m in live_scores if m.statut != "TER"]
+        if goals:
+            self._last_goal_at = time.monotonic()
+
+    def record_cycle(self, cpu_seconds):
+        self.cycles += 1
+        self.baseline_cycles += self.current_interval / self.base_seconds
+        self.cycle_cpu_seconds += cpu_seconds
+
+    # --- Décision ---
+
+    def next_interval(self, now=None):
+        """Retourne (délai en secondes, raison)."""
+        now = now or datetime.now(FIXTURE_TIMEZONE)
+        if self._live:
+            if time.monotonic() - self._last_goal_at < self.recent_goal_seconds:
+                return self.fast_seconds, "but récent"
+            if any(minute is not None and minute >= self.final_minutes_from for _, minute in self._live):
+                return self.fast_seconds, "fin de match en cours"
+            if all(statut == "MT" for statut, _ in self._live):
+                return self.half_time_seconds, "tous les matchs à la mi-temps"
+            return self.base_seconds, f"{len(self._live)} match(s) en cours"
+        if self.fixtures is None:
+            return self.unknown_calendar_seconds, "calendrier du jour indisponible"
+        upcoming = [kickoff for kickoff in self.fixtures if kickoff + self.kickoff_lead >= now]
+        if not upcoming:
+            return self.idle_seconds, "plus aucun match aujourd'hui"
+        wait = (upcoming[0] - self.kickoff_lead - now).total_seconds()
+        if wait <= 0:
+            return self.base_seconds, f"coup d'envoi à {upcoming[0]:%H:%M}"
+        return int(min(self.idle_seconds, max(self.base_seconds, wait))), f"prochain coup d'envoi à {upcoming[0]:%H:%M}"
+
+    # --- Métriques ---
+
+    @property
+    def cycles_saved(self):
+        return max(0.0, self.baseline_cycles - self.cycles)
+
+    def savings_report(self, fetches_per_cycle=2):
+        avg_cpu = self.cycle_cpu_seconds / self.cycles if self.cycles else 0.0
+        return {
+            'cycles': self.cycles,
+            'cycles_saved': self.cycles_saved,
+            'fetches_saved': self.cycles_saved * fetches_per_cycle,
+            'cpu_hours_saved': self.cycles_saved * avg_cpu / 3600,
+        }
@@ -0,0 +1,45 @@
+# app/published_matches.py
+# Mémoire des matchs terminés déjà publiés (GlobalPublishedMatch), sans relire tout l'historique.
+
+import json
+from datetime import datetime, timedelta
+from app.models import GlobalPublishedMatch
+from app.bulk import chunks
+
+_IN_CHUNK = 500
+
+
+def unpublished_ids(session, candidate_ids):
+    """Parmi les IDs de la page, ceux qui n'ont pas encore été publiés (requête IN sur l'index unique)."""
+    candidates = set(candidate_ids)
+    if not candidates:
+        return set()
+    published = set()
+    for chunk in chunks(list(candidates), _IN_CHUNK):
+        published.update(row[0] for row in session.query(GlobalPublishedMatch.match_identifier)
+                         .filter(GlobalPublishedMatch.match_identifier.in_(chunk)))
+    return candidates - published
+
+
+def prune_published(session, retention_days):
+    """Supprime les entrées publiées il y a plus de `retention_days` jours. Retourne le nombre de lignes."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    return session.query(GlobalPublishedMatch).filter(GlobalPublishedMatch.published_at < cutoff).delete(synchronize_session=False)
+
+
+def import_published_ids(session, ids):
+    """Insère en une instruction par lot les IDs absents de la table. Retourne le nombre d'IDs ajoutés."""
+    new_ids = sorted(unpublished_ids(session, (str(i) for i in ids)))
+    now = datetime.utcnow()
+    for chunk in chunks(new_ids, _IN_CHUNK):
+        session.execute(GlobalPublishedMatch.__table__.insert(), [{'match_identifier': i, 'published_at': now} for i in chunk])
+    return len(new_ids)
+
+
+def load_legacy_file(path):
+    """Lit l'ancien published_finished.json (liste d'IDs de matchs)."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path} : une liste d'IDs était attendue")
+    return data
@@ -155,12 +155,17 @@ def dashboard():
     history_items.sort(key=lambda x: x['timestamp'], reverse=True)
     
     # --- FIN DE LA LOGIQUE D'HISTORIQUE UNIFIÉ ---
+
+    # Bilan des publications des 7 derniers jours, par page
+    from .delivery_log import page_stats
+    delivery_stats = page_stats(db.session, [page.facebook_page_id for page in pages])
         
     return render_template(
         'dashboard.html', 
         title='Tableau de bord', 
         pages=pages, 
-        history_items=history_items[:15] # On renvoie une seule liste triée de 15 éléments max
+        history_items=history_items[:15], # On renvoie une seule liste triée de 15 éléments max
+        delivery_stats=delivery_stats
     )
 
 # =============================================================================
@@ -317,6 +322,7 @@ def select_facebook_page():
                 )
                 db.session.add(new_page)
                 db.session.commit()
+                tasks.invalidate_eligible_pages()
                 flash(_("La page '%(page_name)s' a été connectée avec succès !", page_name=chosen_page['name']), "success")
             except Exception as e:
                 db.session.rollback()
@@ -338,6 +344,7 @@ def toggle_page_active(page_id):
     if page.owner != current_user: return redirect(url_for('main.dashboard'))
     page.is_active = not page.is_active
     db.session.commit()
+    tasks.invalidate_eligible_pages()
     status = "activée" if page.is_active else "désactivée"
     flash(f"La page '{page.page_name}' a été {status}.", "success")
     return redirect(url_for('main.dashboard'))
@@ -348,8 +355,10 @@ def delete_page(page_id):
     # ... (inchangé)
     page = FacebookPage.query.get_or_404(page_id)
     if page.owner != current_user: return redirect(url_for('main.dashboard'))
+    facebook_page_id = page.facebook_page_id
     db.session.delete(page)
     db.session.commit()
+    tasks.invalidate_eligible_pages()
     flash(f"La page '{page.page_name}' a été supprimée.", "success")
     return redirect(url_for('main.dashboard'))
 
@@ -383,6 +392,7 @@ def start_trial():
         
         # On sauvegarde les changements dans la base de données
         db.session.commit()
+        tasks.invalidate_eligible_pages()
         
         flash("Votre période d'essai de 48h a commencé ! Connectez une page pour en profiter.", "success")
     
@@ -491,6 +501,7 @@ def cancel_fedapay_subscription():
         current_user.subscription_plan = None
         current_user.subscription_expires_at = None # On nettoie la date d'expiration
         db.session.commit()
+        tasks.invalidate_eligible_pages()
         
         # On peut aussi annuler l'abonnement côté Fedapay via leur API si c'est possible
         # pour arrêter les futurs paiements, mais pour l'instant on se contente de désactiver
@@ -571,6 +582,7 @@ def fedapay_callback():
 
             # 5. On valide toutes les modifications
             db.session.commit()
+            tasks.invalidate_eligible_pages()
             
             return redirect(url_for('main.payment_success'))
         else:
@@ -652,7 +664,21 @@ def clear_all_notifications():
 @admin_required
 def admin_dashboard():
     """Affiche la page principale de l'administration."""
-    return render_template('admin.html')
+    from .outbox import queue_stats
+    from .leader import lease_status
+    return render_template('admin.html', outbox=queue_stats(db.session), leader=lease_status(db.session), utcnow=datetime.utcnow())
+
+@main.route('/admin/deliveries')
+@login_required
+@admin_required
+def admin_deliveries():
+    """Pages les plus lentes et celles qui échouent le plus, sur les 7 derniers jours."""
+    from .delivery_log import slowest_pages, failing_pages
+    slowest = slowest_pages(db.session)
+    failing = failing_pages(db.session)
+    page_ids = {item['facebook_page_id'] for item in slowest + failing}
+    pages = {page.facebook_page_id: page for page in FacebookPage.query.filter(FacebookPage.facebook_page_id.in_(page_ids)).all()} if page_ids else {}
+    return render_template('admin_deliveries.html', title='Suivi des publications', slowest=slowest, failing=failing, pages=pages)
 
 # Dans app/routes.py
 
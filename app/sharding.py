@@ -0,0 +1,86 @@
+# app/sharding.py
+# Répartition des pages entre les publishers : chaque nœud s'inscrit par battement en base et
+# ne publie que les pages que lui attribue l'anneau de hachage cohérent des nœuds vivants.
+
+import bisect
+import hashlib
+from datetime import datetime, timedelta
+from app.models import PublisherNode
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Anneau de hachage cohérent : `replicas` points par nœud ; l'arrivée d'un nœud ne déplace qu'environ 1/N des clés."""
+
+    def __init__(self, nodes=(), replicas=100):
+        self.nodes = tuple(sorted(set(nodes)))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key):
+        if not self._points:
+            return None
+        return self._owners[bisect.bisect(self._points, _hash(key)) % len(self._points)]
+
+
+def heartbeat(session, node_id, now=None):
+    """Inscrit ou rafraîchit le nœud (le commit reste à l'appelant)."""
+    now = now or datetime.utcnow()
+    node = session.query(PublisherNode).filter_by(node_id=node_id).first()
+    if node is None:
+        session.add(PublisherNode(node_id=node_id, started_at=now, heartbeat_at=now))
+    else:
+        node.heartbeat_at = now
+
+
+def live_nodes(session, ttl_seconds, now=None):
+    since = (now or datetime.utcnow()) - timedelta(seconds=ttl_seconds)
+    return [node_id for (node_id,) in session.query(PublisherNode.node_id).filter(PublisherNode.heartbeat_at >= since)]
+
+
+def unregister(session, node_id):
+    return session.query(PublisherNode).filter_by(node_id=node_id).delete(synchronize_session=False)
+
+
+def prune_nodes(session, older_than_seconds=86400):
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    return session.query(PublisherNode).filter(PublisherNode.heartbeat_at < cutoff).delete(synchronize_session=False)
+
+
+class ShardView:
+    """
+    Vue locale de l'anneau. `refresh(session)` envoie le battement du nœud puis reconstruit
+    l'anneau si l'ensemble des nœuds vivants a changé (arrivée, départ, battement manqué).
+    Pendant une bascule, un envoi déjà réservé par l'ancien propriétaire reste à lui jusqu'à la fin de son bail.
+    """
+
+    def __init__(self, node_id, ttl_seconds=30, replicas=100):
+        self.node_id = node_id
+        self.ttl_seconds = ttl_seconds
+        self.replicas = replicas
+        self.ring = HashRing((node_id,), replicas)
+        self.rebalances = 0
+        self.refreshed = False
+
+    def refresh(self, session, now=None):
+        """Retourne True si la répartition a changé."""
+        heartbeat(session, self.node_id, now)
+        session.commit()
+        nodes = set(live_nodes(session, self.ttl_seconds, now)) | {self.node_id}
+        first, self.refreshed = not self.refreshed, True
+        if tuple(sorted(nodes)) == self.ring.nodes:
+            return False
+        self.ring = HashRing(nodes, self.replicas)
+        if not first:
+            self.rebalances += 1
+        return True
+
+    def owns(self, page_id):
+        return self.ring.owner(page_id) == self.node_id
+
+    def owned(self, page_ids):
+        return [page_id for page_id in page_ids if self.owns(page_id)]
@@ -0,0 +1,237 @@
+# app/supervisor.py
+# Boucle principale du worker : attente bloquante jusqu'à SIGTERM/SIGINT, arrêt propre
+# et points de contrôle HTTP de disponibilité (/health/ready) et de vie (/health/live).
+# Supervision des processus enfants quand les rôles du worker tournent séparément.
+# Les mesures (/metrics) des enfants remontent au parent avec leur battement.
+
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from app.metrics import render, log
+
+
+class WorkerSupervisor:
+    """
+    `run(start, stop)` appelle `start()`, bloque sans consommer de CPU jusqu'au signal d'arrêt,
+    puis appelle `stop()`. Le worker est vivant tant que `beat()` est appelé au moins toutes les
+    `liveness_seconds` secondes (tâche planifiée : un ordonnanceur bloqué est ainsi détecté).
+    """
+
+    def __init__(self, name, liveness_seconds=60, signals=(signal.SIGTERM, signal.SIGINT), details=None, ready_check=None, metrics=None):
+        self.name = name
+        self.metrics = metrics
+        self.liveness_seconds = liveness_seconds
+        self.signals = signals
+        self.details = details
+        self.ready_check = ready_check
+        self.stop_event = threading.Event()
+        self.ready = False
+        self.draining = False
+        self.started_at = time.monotonic()
+        self.last_beat = time.monotonic()
+        self._server = None
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def alive(self):
+        return not self.draining and time.monotonic() - self.last_beat < self.liveness_seconds
+
+    def is_ready(self):
+        return self.ready and self.alive() and (self.ready_check is None or self.ready_check())
+
+    def status(self):
+        status = {
+            'worker': self.name,
+            'ready': self.is_ready(),
+            'alive': self.alive(),
+            'draining': self.draining,
+            'uptime_seconds': round(time.monotonic() - self.started_at),
+            'last_beat_seconds': round(time.monotonic() - self.last_beat, 1),
+        }
+        if self.details is not None:
+            status['processes'] = self.details()
+        return status
+
+    def _on_signal(self, signum, frame):
+        if self.stop_event.is_set():
+            log('worker.killed', "Second signal, arrêt immédiat", level='warning', signal=signal.Signals(signum).name)
+            os._exit(1)
+        log('worker.stopping', "Signal reçu, arrêt en cours", signal=signal.Signals(signum).name)
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        for signum in self.signals:
+            signal.signal(signum, self._on_signal)
+
+    def serve_health(self, port, host='0.0.0.0'):
+        """Démarre le serveur de contrôle dans un thread ; `port` 0 le désactive."""
+        if not port:
+            return None
+        supervisor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?')[0].rstrip('/')
+                if path == '/metrics' and supervisor.metrics is not None:
+                    body = supervisor.metrics().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if path == '/health/live':
+                    ok = supervisor.alive()
+                elif path == '/health/ready':
+                    ok = supervisor.is_ready()
+                elif path in ('', '/health'):
+                    ok = True
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(supervisor.status()).encode('utf-8')
+                self.send_response(200 if ok else 503)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='health', daemon=True).start()
+        log('worker.health_server', "Contrôle de santé démarré (/health/live, /health/ready, /metrics)", port=self._server.server_address[1])
+        return self._server
+
+    def run(self, start, stop):
+        self.install_signal_handlers()
+        try:
+            start()
+            self.beat()
+            self.ready = True
+            log('worker.ready', "Worker prêt", worker=self.name)
+            self.stop_event.wait()
+        finally:
+            self.ready = False
+            self.draining = True
+            try:
+                stop()
+            finally:
+                if self._server is not None:
+                    self._server.shutdown()
+                log('worker.stopped', "Worker arrêté", worker=self.name)
+
+
+class ProcessSupervisor:
+    """
+    Un processus enfant par rôle, lancé par `target(rôle, battement, file des mesures)`. L'enfant écrit
+    l'heure de son dernier battement dans la valeur partagée et y joint un instantané de ses mesures
+    dans la file ; un enfant arrêté ou muet depuis plus de
+    `liveness_seconds` secondes est relancé, avec une attente doublée à chaque redémarrage
+    rapproché (plafonnée à `max_backoff` secondes).
+    """
+
+    def __init__(self, roles, target, liveness_seconds=60, max_backoff=60, stable_seconds=300):
+        self.roles = list(roles)
+        self.target = target
+        self.liveness_seconds = liveness_seconds
+        self.max_backoff = max_backoff
+        self.stable_seconds = stable_seconds
+        # spawn : l'enfant repart d'un interpréteur neuf, sans les threads ni les connexions du parent
+        self._context = multiprocessing.get_context('spawn')
+        self._children = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._metrics_queue = self._context.Queue()
+        self._snapshots = {}
+
+    def _spawn(self, role):
+        beat = self._context.Value('d', time.time())
+        process = self._context.Process(target=self.target, args=(role, beat, self._metrics_queue), name=f"worker-{role}")
+        process.start()
+        child = self._children.setdefault(role, {'restarts': 0, 'backoff': 0})
+        child.update(process=process, beat=beat, started_at=time.time(), next_start=None)
+        log('supervisor.spawned', "Rôle démarré", role=role, pid=process.pid)
+
+    def start(self, supervisor, interval=2):
+        with self._lock:
+            for role in self.roles:
+                self._spawn(role)
+        threading.Thread(target=self._monitor, args=(supervisor, interval), name='supervisor', daemon=True).start()
+
+    def _monitor(self, supervisor, interval):
+        while not supervisor.stop_event.wait(interval):
+            supervisor.beat()
+            self._drain_metrics()
+            with self._lock:
+                for role, child in self._children.items():
+                    self._check(role, child)
+
+    def _check(self, role, child):
+        if self._stopping:
+            return
+        process, now = child['process'], time.time()
+        if child['next_start'] is not None:
+            if now >= child['next_start']:
+                child['restarts'] += 1
+                self._spawn(role)
+            return
+        if process.is_alive() and now - child['beat'].value > self.liveness_seconds:
+            log('supervisor.unresponsive', "Rôle sans battement, arrêt forcé", level='error', role=role,
+                silent_seconds=round(now - child['beat'].value))
+            process.kill()
+            process.join(5)
+        if process.is_alive():
+            return
+        stable = now - child['started_at'] >= self.stable_seconds
+        child['backoff'] = 1 if stable or not child['backoff'] else min(self.max_backoff, child['backoff'] * 2)
+        child['next_start'] = now + child['backoff']
+        log('supervisor.exited', "Rôle arrêté, redémarrage planifié", level='warning', role=role,
+            exitcode=process.exitcode, backoff_seconds=child['backoff'])
+
+    def _drain_metrics(self):
+        while True:
+            try:
+                role, snapshot = self._metrics_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._snapshots[role] = snapshot
+
+    def render_metrics(self):
+        """Mesures du dernier instantané de chaque rôle, étiquetées par rôle."""
+        return render([({'role': role}, snapshot) for role, snapshot in sorted(self._snapshots.items())])
+
+    def all_alive(self):
+        with self._lock:
+            return bool(self._children) and all(c['process'].is_alive() for c in self._children.values())
+
+    def status(self):
+        with self._lock:
+            return {role: {'pid': c['process'].pid, 'alive': c['process'].is_alive(), 'restarts': c['restarts'],
+                           'last_beat_seconds': round(time.time() - c['beat'].value, 1)}
+                    for role, c in self._children.items()}
+
+    def stop(self, timeout):
+        """Envoie SIGTERM à chaque enfant, attend leur arrêt propre puis tue les retardataires."""
+        with self._lock:
+            self._stopping = True
+            processes = [c['process'] for c in self._children.values()]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                log('supervisor.kill', "Processus toujours actif après le délai, arrêt forcé", level='warning',
+                    process=process.name, timeout_seconds=timeout)
+                process.kill()
+                process.join(5)
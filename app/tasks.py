@@ -1,7 +1,7 @@
 # app/tasks.py (Version Finale de Production - 100% BDD et Logique Corrigée)
 
-import time, hashlib, requests
-from bs4 import BeautifulSoup
+import time, hashlib, requests, threading
+from functools import partial
 from datetime import datetime, date, timedelta
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -12,14 +12,53 @@ from selenium.common.exceptions import TimeoutException
 from facebook import GraphAPI
 
 from app import scheduler, db
-from app.models import User, FacebookPage, Broadcast, PublishedNews, GlobalMatchState, GlobalPublishedMatch, GlobalState
+from app.models import User, FacebookPage, Broadcast, PublishedNews, GlobalMatchState, GlobalPublishedMatch, GlobalState, OutboxMessage, OutboxDelivery, Notification
 from app.services import EncryptionService
 from app.plans import FEDAPAY_PLANS
+from app.browser_pool import BrowserPool
+from app.fetchers import build_fetcher, PageChangeTracker
+from app.parsers import parse_live_scores, parse_finished_matches, parse_match_page, parse_fixtures
+from app.polling import AdaptivePoller, FIXTURE_TIMEZONE
+from app.enrichment import EnrichmentRunner, MatchEnrichmentCache
+from app.cycles import CycleRunner
+from app.metrics import metrics, log
+from app.coalescer import Coalescer, GOAL_PRIORITY, FULL_TIME_PRIORITY, HALF_TIME_PRIORITY, KICKOFF_PRIORITY, SUMMARY_PRIORITY
+from app.fanout import FanoutEngine, PageTarget, RateLimited, latency_report
+from app.outbox import enqueue, idempotency_key, due_page_ids, claim_due, mark_sent, mark_failed, mark_dead, postpone, resolve_edit, prune as prune_outbox, PENDING, DEAD
+from app.token_cache import PageClientCache
+from app.circuit import PageCircuitBreaker, PERMANENT
+from app.leader import LeaderLease, worker_identity
+from app.sharding import ShardView, unregister as unregister_publisher, prune_nodes as prune_publisher_nodes
+from app.delivery_log import log_row, write as write_delivery_log, prune as prune_delivery_log
+from app.eligibility import EligiblePage, EligiblePagesCache, read_version as read_eligibility_version, bump_version as bump_eligibility_version
+from app.graph_batch import make_senders as make_graph_senders, set_graph_base
+from app.published_matches import unpublished_ids, prune_published
+from app.match_state import MatchStateStore, save_snapshot, state_key, KICKOFF, GOAL, DISALLOWED_GOAL, HALF_TIME
 
 # --- Config ---
 _app = None
+_browser_pool = None
+_fetcher = None
+_live_page_tracker = PageChangeTracker()
+_enrichment_runner = None
+_match_cache = None
+_poller = None
+_scores_cycle = None
+_match_store = None
+_fanout = None
+_page_clients = None
+_circuit_breaker = None
+_leader_lease = None
+_shard_view = None
+_eligible_pages = None
+_coalescer = None
+_deferred_posts = {}
 LIVE_URL = "https://www.matchendirect.fr/live-score/"
 FINISHED_URL = "https://www.matchendirect.fr/live-foot/"
+# Page de match rendue côté serveur : sans aucun de ces blocs, le HTML brut n'est qu'une coquille JS
+MATCH_PAGE_SELECTOR = "#match_header, table.matchEvents, span.st1, div.progressBar"
+# Intervalle de la sonde des circuits ouverts (circuit_probe_job)
+CIRCUIT_PROBE_INTERVAL_SECONDS = 60
 
 def init_app(app):
     global _app
@@ -47,95 +86,685 @@ def get_browser():
         driver.set_page_load_timeout(60)
         return driver
     except Exception as e:
-        print(f"[ERREUR SELENIUM] Impossible de démarrer le navigateur : {e}")
+        log('browser.start_failed', "Impossible de démarrer le navigateur", level='error', error=str(e))
         return None
 
-def broadcast_to_facebook(active_pages, message):
+def init_browser_pool():
+    """Crée le pool de navigateurs du worker. Sans pool, chaque cycle démarre son propre Chrome."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            get_browser,
+            size=_app.config['BROWSER_POOL_SIZE'],
+            max_page_loads=_app.config['BROWSER_MAX_PAGE_LOADS'],
+            max_rss_mb=_app.config['BROWSER_MAX_RSS_MB'],
+        )
+        # En mode HTTP, Chrome ne sert qu'en secours : on ne le démarre qu'à la demande
+        if _app.config['SCRAPER_FETCH_MODE'] == 'selenium':
+            _browser_pool.warm_up()
+    return _browser_pool
+
+def shutdown_browser_pool():
+    global _browser_pool
+    if _browser_pool is not None:
+        _browser_pool.close()
+        _browser_pool = None
+
+def drain_and_shutdown(drain_seconds):
+    """
+    Arrête l'ordonnanceur en laissant les tâches en cours se terminer (au plus `drain_seconds`),
+    écrit l'état des matchs et libère navigateurs et pools de threads.
+    """
+    def stop_scheduler():
+        try:
+            scheduler.shutdown(wait=True)
+        except Exception as e:
+            log('worker.scheduler_stop_failed', "Arrêt de l'ordonnanceur", level='error', error=str(e))
+    stopper = threading.Thread(target=stop_scheduler, name='drain', daemon=True)
+    stopper.start()
+    stopper.join(drain_seconds)
+    if stopper.is_alive():
+        log('worker.drain_timeout', "Tâches encore en cours, fermeture forcée des navigateurs", level='warning', drain_seconds=drain_seconds)
+    try:
+        flush_match_state(force=True)
+    except Exception as e:
+        log('match_state.final_flush_failed', "Instantané final non écrit", level='error', error=str(e))
+    release_leadership()
+    leave_publisher_ring()
+    if _enrichment_runner is not None: _enrichment_runner.shutdown()
+    shutdown_browser_pool()
+    if _fanout is not None: _fanout.shutdown()
+
+def acquire_browser():
+    with metrics.span('browser_acquire'):
+        return _browser_pool.acquire() if _browser_pool else get_browser()
+
+def release_browser(driver):
+    if _browser_pool: _browser_pool.release(driver)
+    elif driver: driver.quit()
+
+def get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = build_fetcher(_app.config['SCRAPER_FETCH_MODE'], acquire_browser, release_browser,
+                                 pool_size=_app.config['HTTP_POOL_SIZE'])
+    return _fetcher
+
+def get_enrichment_runner():
+    global _enrichment_runner
+    if _enrichment_runner is None:
+        _enrichment_runner = EnrichmentRunner(max_workers=_app.config['ENRICHMENT_WORKERS'],
+                                              budget_seconds=_app.config['ENRICHMENT_BUDGET_SECONDS'])
+    return _enrichment_runner
+
+def get_match_cache():
+    global _match_cache
+    if _match_cache is None:
+        _match_cache = MatchEnrichmentCache(load_match_page, ttl=_app.config['MATCH_CACHE_TTL_SECONDS'])
+    return _match_cache
+
+def get_poller():
+    global _poller
+    if _poller is None:
+        _poller = AdaptivePoller(
+            base_seconds=_app.config['POLL_BASE_SECONDS'],
+            fast_seconds=_app.config['POLL_FAST_SECONDS'],
+            half_time_seconds=_app.config['POLL_HALF_TIME_SECONDS'],
+            idle_seconds=_app.config['POLL_IDLE_SECONDS'],
+        )
+    return _poller
+
+def get_fanout():
+    global _fanout
+    if _fanout is None:
+        _fanout = FanoutEngine(
+            max_workers=_app.config['FANOUT_WORKERS'],
+            page_rate=_app.config['FANOUT_PAGE_RATE'],
+            page_burst=_app.config['FANOUT_PAGE_BURST'],
+            app_rate=_app.config['FANOUT_APP_RATE'],
+            app_burst=_app.config['FANOUT_APP_BURST'],
+            max_wait=_app.config['FANOUT_MAX_WAIT_SECONDS'],
+            usage_slowdown_percent=_app.config['FANOUT_USAGE_SLOWDOWN_PERCENT'],
+        )
+    return _fanout
+
+def get_circuit_breaker():
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        config = _app.config
+        _circuit_breaker = PageCircuitBreaker(
+            failure_threshold=config['CIRCUIT_FAILURE_THRESHOLD'],
+            open_seconds=config['CIRCUIT_OPEN_SECONDS'],
+            max_open_seconds=config['CIRCUIT_MAX_OPEN_SECONDS'],
+            throttle_seconds=config['CIRCUIT_THROTTLE_SECONDS'],
+            reauth_probe_seconds=config['CIRCUIT_REAUTH_PROBE_SECONDS'],
+        )
+    return _circuit_breaker
+
+def notify_reauthorization(page):
+    """Prévient le propriétaire d'une page dont le jeton est refusé, sans doubler une notification non lue."""
+    content = (f"Votre page « {page.page_name} » n'accepte plus les publications du bot (autorisation expirée ou retirée). "
+               f"Reconnectez-la depuis votre tableau de bord pour reprendre les publications.")
+    if not Notification.query.filter_by(user_id=page.user_id, content=content, is_read=False).first():
+        db.session.add(Notification(user_id=page.user_id, content=content))
+    log('circuit.reauthorization_requested', "Page à reconnecter, propriétaire notifié", level='warning', page=page.page_name)
+
+def get_page_clients():
+    """Jetons déchiffrés et clients Graph par page ; le Fernet est construit une seule fois."""
+    global _page_clients
+    if _page_clients is None:
+        encryption_service = EncryptionService()
+        session = get_fanout().session
+        set_graph_base(_app.config['GRAPH_API_BASE'])
+        _page_clients = PageClientCache(
+            encryption_service.decrypt,
+            lambda access_token: GraphAPI(access_token=access_token, session=session),
+            ttl=_app.config['PAGE_TOKEN_CACHE_TTL_SECONDS'],
+        )
+    return _page_clients
+
+def load_eligible_pages(now):
+    """Pages actives dont le propriétaire est superadmin, abonné ou en essai, et prochaine fin d'essai."""
+    rows = db.session.query(FacebookPage.facebook_page_id, FacebookPage.page_name).join(User).filter(
+        FacebookPage.is_active == True,
+        db.or_(User.role == 'superadmin', User.subscription_status == 'active', User.trial_ends_at > now)
+    ).all()
+    next_trial_end = db.session.query(db.func.min(User.trial_ends_at)).join(FacebookPage).filter(
+        FacebookPage.is_active == True, User.trial_ends_at > now).scalar()
+    pages = tuple(EligiblePage(*row) for row in rows)
+    log('eligibility.rebuilt', "Liste des pages éligibles reconstruite", pages=len(pages),
+        next_trial_end=next_trial_end.isoformat() if next_trial_end else None)
+    return pages, next_trial_end
+
+def get_eligible_pages():
+    global _eligible_pages
+    if _eligible_pages is None:
+        _eligible_pages = EligiblePagesCache(load_eligible_pages, lambda: read_eligibility_version(db.session),
+                                             version_check_seconds=_app.config['ELIGIBILITY_VERSION_CHECK_SECONDS'])
+    return _eligible_pages.get()
+
+def invalidate_eligible_pages():
+    """À appeler après un changement de page, d'abonnement ou d'essai : ce processus et les autres reconstruisent la liste."""
+    if _eligible_pages is not None: _eligible_pages.invalidate()
     try:
-        db.session.add(Broadcast(content=message))
+        bump_eligibility_version(db.session)
         db.session.commit()
-        print(f"[HISTORIQUE] Message enregistré: {message[:60]}...")
     except Exception as e:
         db.session.rollback()
-        _app.logger.error(f"[HISTORIQUE ERREUR] {e}")
-    if not active_pages:
-        print(f"[BROADCAST IGNORÉ] Aucun auditeur actif.")
-        return
-    print(f"[BROADCAST] Envoi à {len(active_pages)} page(s)...")
-    encryption_service = EncryptionService()
-    for page in active_pages:
+        log('eligibility.bump_failed', "Version non publiée, les autres processus verront le changement à la prochaine fin d'essai",
+            level='error', error=str(e))
+
+def get_scores_cycle():
+    global _scores_cycle
+    if _scores_cycle is None:
+        _scores_cycle = CycleRunner('scores', deadline_seconds=_app.config['CYCLE_DEADLINE_SECONDS'])
+    return _scores_cycle
+
+def get_coalescer():
+    global _coalescer
+    if _coalescer is None:
+        config = _app.config
+        _coalescer = Coalescer(
+            window_seconds=config['COALESCE_WINDOW_SECONDS'],
+            burst_budget=config['COALESCE_BURST_BUDGET'],
+            burst_seconds=config['COALESCE_BURST_SECONDS'],
+            deadlines={HALF_TIME_PRIORITY: config['COALESCE_HALF_TIME_DEADLINE_SECONDS'],
+                       KICKOFF_PRIORITY: config['COALESCE_KICKOFF_DEADLINE_SECONDS'],
+                       SUMMARY_PRIORITY: config['COALESCE_SUMMARY_DEADLINE_SECONDS']},
+            merge=merge_posts,
+        )
+    return _coalescer
+
+def get_leader_lease():
+    global _leader_lease
+    if _leader_lease is None:
+        _leader_lease = LeaderLease(worker_identity(), lease_seconds=_app.config['LEADER_LEASE_SECONDS'])
+    return _leader_lease
+
+def is_scraping_leader():
+    return _leader_lease is not None and _leader_lease.is_leader()
+
+def reset_scraping_state():
+    """À la prise du bail : l'état en mémoire d'un mandat précédent est périmé, il est relu depuis la base."""
+    global _match_store, _coalescer, _live_page_tracker
+    _match_store, _coalescer = None, None
+    _live_page_tracker = PageChangeTracker()
+    _deferred_posts.clear()
+    if _fetcher is not None and hasattr(_fetcher, 'forget'): _fetcher.forget(LIVE_URL)
+
+def leader_heartbeat():
+    """Prend ou renouvelle le bail du scraper ; un worker en attente le reprend dans les 10 s suivant son expiration."""
+    if _app is None: return
+    lease = get_leader_lease()
+    was_leader = lease.is_leader()
+    with _app.app_context():
         try:
-            graph = GraphAPI(access_token=encryption_service.decrypt(page.encrypted_page_access_token))
-            graph.put_object(parent_object=page.facebook_page_id, connection_name="feed", message=message)
-            print(f"  -> Succès pour '{page.page_name}'")
+            leader = lease.heartbeat(db.session)
         except Exception as e:
-            print(f"  -> ERREUR FB pour '{page.page_name}': {e}")
+            db.session.rollback()
+            leader = lease.is_leader()
+            metrics.error('leader_heartbeat', e)
+            if was_leader and not leader:
+                lease.losses += 1
+                metrics.inc('leader_lost_renewals_total', reason='error')
+                metrics.set('leader_is_leader', 0)
+            log('leader.renewal_failed', "Bail non renouvelé" + (", encore valable localement" if leader else ", scraping suspendu"),
+                level='warning', still_leader=leader, error=str(e))
+    if leader == was_leader: return
+    report = lease.report()
+    if leader:
+        reset_scraping_state()
+        takeover = round(report['last_takeover_seconds'], 1) if report['last_takeover_seconds'] is not None and report['takeovers'] else None
+        log('leader.acquired', "Ce worker devient leader du scraping", holder=lease.holder, takeover_seconds=takeover,
+            takeovers=report['takeovers'], losses=report['losses'], churn_per_hour=round(report['churn_per_hour'], 2))
+        try:
+            scheduler.scheduler.modify_job('centralized_checks_job', next_run_time=datetime.now())
+        except Exception:
+            pass
+    else:
+        log('leader.lost', "Ce worker n'est plus leader, passage en attente", level='warning', holder=lease.holder, losses=report['losses'])
 
-def get_live_scores(driver):
-    print("🔎 Scraping des scores en direct...")
-    scores = {}
+def release_leadership():
+    if _leader_lease is None or _app is None: return
+    with _app.app_context():
+        try:
+            if _leader_lease.release(db.session):
+                log('leader.released', "Bail rendu", holder=_leader_lease.holder)
+        except Exception as e:
+            db.session.rollback()
+            log('leader.release_failed', "Bail non rendu, il expirera seul", level='warning', error=str(e))
+
+def get_shard_view():
+    """Part des pages servie par ce publisher ; le nœud s'inscrit au premier appel."""
+    global _shard_view
+    if _shard_view is None:
+        view = ShardView(worker_identity(), ttl_seconds=_app.config['PUBLISHER_NODE_TTL_SECONDS'],
+                         replicas=_app.config['PUBLISHER_RING_REPLICAS'])
+        view.refresh(db.session)
+        _shard_view = view
+    return _shard_view
+
+def publisher_heartbeat():
+    """Battement du publisher et mise à jour de l'anneau quand des nœuds arrivent ou partent."""
+    if _app is None: return
+    with _app.app_context():
+        try:
+            view = get_shard_view()
+            if view.refresh(db.session):
+                log('shards.rebalanced', "Répartition des pages recalculée", publishers=len(view.ring.nodes),
+                    rebalances=view.rebalances, node=view.node_id)
+        except Exception as e:
+            db.session.rollback()
+            log('shards.heartbeat_failed', "Battement non enregistré", level='error', error=str(e))
+
+def leave_publisher_ring():
+    """Arrêt propre : les autres nœuds reprennent les pages dès leur prochain battement."""
+    if _shard_view is None or _app is None: return
+    with _app.app_context():
+        try:
+            unregister_publisher(db.session, _shard_view.node_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            log('shards.unregister_failed', "Désinscription impossible, le nœud expirera seul", level='warning', error=str(e))
+
+def get_match_store():
+    """État des matchs en direct du worker, repris depuis la base au premier cycle."""
+    global _match_store
+    if _match_store is None:
+        _match_store = MatchStateStore()
+    if not _match_store.loaded:
+        _match_store.load(GlobalMatchState.query.all())
+    return _match_store
+
+def flush_match_state(force=False):
+    """Écrit en base l'instantané des matchs modifiés ou disparus depuis le précédent."""
+    store = _match_store
+    if store is None or not store.pending: return
+    if not force and time.monotonic() - store.last_flush < _app.config['MATCH_STATE_FLUSH_SECONDS']: return
+    changed, removed = store.take_snapshot()
+    try:
+        with metrics.span('db_write'):
+            statements = save_snapshot(db.session, changed, removed)
+            db.session.commit()
+        log('match_state.flushed', "Instantané des matchs écrit en base", written=len(changed), removed=len(removed), statements=statements)
+    except Exception as e:
+        db.session.rollback()
+        store.requeue(changed, removed)
+        log('match_state.flush_failed', "Instantané non écrit, nouvel essai au prochain cycle", level='error', error=str(e))
+
+def schedule_next_cycle(cpu_seconds):
+    """Replanifie le cycle des scores selon l'activité observée et journalise la décision."""
+    poller = get_poller()
+    interval, reason = poller.next_interval()
+    if interval != poller.current_interval:
+        try:
+            scheduler.scheduler.reschedule_job('centralized_checks_job', trigger='interval', seconds=interval)
+            poller.current_interval = interval
+        except Exception as e:
+            log('polling.reschedule_failed', "Replanification impossible", level='error', error=str(e))
+    poller.record_cycle(cpu_seconds)
+    report = poller.savings_report()
+    metrics.set('poll_interval_seconds', poller.current_interval)
+    log('polling.scheduled', "Prochain cycle planifié", interval_seconds=poller.current_interval, reason=reason, cycles=report['cycles'],
+        fetches_saved=round(report['fetches_saved']), cpu_hours_saved=round(report['cpu_hours_saved'], 3))
+
+def log_fetcher_cycle():
+    if _fetcher is not None and hasattr(_fetcher, 'cycle_report'):
+        report = _fetcher.cycle_report()
+        log('fetch.cycle', "Pages récupérées ce cycle", http=report['http'], avg_http_ms=round(report['avg_http_ms']), selenium=report['selenium'])
+    if _match_cache is not None:
+        log('match_cache.stats', "Cache des pages de match depuis le démarrage", hits=_match_cache.hits, misses=_match_cache.misses)
+    log_browser_pool_cycle()
+
+def log_browser_pool_cycle():
+    if not _browser_pool: return
+    report = _browser_pool.cycle_report()
+    log('browser_pool.cycle', "Pool de navigateurs", warm_acquires=report['warm_acquires'], saved_seconds=round(report['saved_seconds'], 2),
+        avg_cold_start=round(report['avg_cold_start'], 2), total_saved_seconds=round(report['total_saved_seconds']),
+        cold_starts=report['cold_starts'], recycled=report['recycled'])
+
+def broadcast_to_facebook(active_pages, message, scope=None):
+    """
+    Enregistre le message dans l'historique et le met en file d'envoi pour chaque page,
+    dans la même transaction ; le dispatcher se charge de la publication.
+    `scope` distingue deux messages identiques (par défaut : le jour), voir outbox.idempotency_key.
+    Retourne l'ID du Broadcast et celui du message en file.
+    """
+    page_ids = [page.facebook_page_id for page in active_pages]
     try:
-        driver.get(LIVE_URL)
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "td.lm3")))
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        for match in soup.select("td.lm3"):
+        with metrics.span('enqueue'):
+            broadcast = Broadcast(content=message)
+            db.session.add(broadcast)
+            db.session.flush()
+            outbox_message, created = enqueue(db.session, message, page_ids, idempotency_key(message, scope), broadcast_id=broadcast.id)
+            if not created:
+                db.session.rollback()
+                log('outbox.duplicate', "Message déjà en file, ignoré", preview=message[:60])
+                return outbox_message.broadcast_id, outbox_message.id
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        log('outbox.enqueue_failed', "Message non enregistré", level='error', preview=message[:60], error=str(e))
+        return None, None
+    metrics.inc('posts_total')
+    log('outbox.enqueued', "Message enregistré et mis en file", message_id=outbox_message.id, pages=len(page_ids), preview=message[:60])
+    if page_ids:
+        wake_outbox_dispatcher()
+    return broadcast.id, outbox_message.id
+
+def update_facebook_posts(broadcast_id, message_id, message):
+    """Phase deux : met à jour l'historique et met en file l'édition des publications du message."""
+    with _app.app_context():
+        try:
+            if broadcast_id and (broadcast := db.session.get(Broadcast, broadcast_id)):
+                broadcast.content = message
+            page_ids = [pid for (pid,) in db.session.query(OutboxDelivery.facebook_page_id)
+                        .filter(OutboxDelivery.message_id == message_id, OutboxDelivery.status != DEAD)]
+            enqueue(db.session, message, page_ids, idempotency_key(message, f"edit:{message_id}"), parent_id=message_id)
+            db.session.commit()
+            log('outbox.edit_enqueued', "Édition des publications mise en file", message_id=message_id, pages=len(page_ids), preview=message[:60])
+        except Exception as e:
+            db.session.rollback()
+            log('outbox.edit_failed', "Édition non mise en file", level='error', message_id=message_id, error=str(e))
+    wake_outbox_dispatcher()
+
+def publish_then_enrich(active_pages, bare_message, fetch, args, compose, scope=None):
+    """Publie le message de base tout de suite, puis l'édite en arrière-plan une fois l'enrichissement récupéré."""
+    broadcast_id, message_id = broadcast_to_facebook(active_pages, bare_message, scope)
+    def complete():
+        try:
+            message = compose(fetch(*args))
+            if message != bare_message and message_id:
+                update_facebook_posts(broadcast_id, message_id, message)
+        except Exception as e:
+            log('enrichment.update_failed', "Publication non enrichie", level='error', error=str(e))
+    get_enrichment_runner().submit(complete)
+
+def wake_outbox_dispatcher():
+    """Avance le prochain passage du dispatcher pour ne pas attendre son intervalle."""
+    try:
+        scheduler.scheduler.modify_job('outbox_dispatch_job', next_run_time=datetime.now())
+    except Exception:
+        pass
+
+def dispatch_outbox():
+    """Publie un lot d'envois arrivés à échéance ; les échecs sont replanifiés ou mis à l'écart."""
+    if _app is None: return
+    with _app.app_context():
+        config = _app.config
+        try:
+            # Chaque publisher ne réserve que les envois des pages que l'anneau lui attribue
+            owned = get_shard_view().owned(due_page_ids(db.session))
+            if not owned: return
+            deliveries = claim_due(db.session, config['OUTBOX_BATCH_SIZE'], config['OUTBOX_LEASE_SECONDS'], page_ids=owned)
+        except Exception as e:
+            db.session.rollback()
+            metrics.error('outbox_claim', e)
+            log('outbox.claim_failed', "Réservation impossible", level='error', error=str(e))
+            return
+        if not deliveries: return
+        pages = {page.facebook_page_id: page for page in FacebookPage.query.filter(
+            FacebookPage.facebook_page_id.in_({d.facebook_page_id for d in deliveries})).all()}
+        by_message = {}
+        for delivery in deliveries:
+            by_message.setdefault(delivery.message_id, []).append(delivery)
+
+        page_clients = get_page_clients()
+        breaker = get_circuit_breaker()
+        for message_id, items in by_message.items():
             try:
-                eq1, eq2 = match.select_one("span.lm3_eq1").text.strip(), match.select_one("span.lm3_eq2").text.strip()
-                score1, score2 = match.select_one("span.scored_1").text.strip(), match.select_one("span.scored_2").text.strip()
-                row = match.find_parent("tr")
-                minute = row.select_one("td.lm2").text.strip() if row.select_one("td.lm2") else ""
-                url = f"https://www.matchendirect.fr{row.select_one('a').get('href')}" if row.select_one('a') else None
-                statut = "MT" if "mi-temps" in minute.lower() else ("TER" if "ter" in minute.lower() else "")
-                scores[f"{eq1} vs {eq2}"] = {"score": f"{score1.strip()} - {score2.strip()}", "statut": statut, "minute": minute, "eq1": eq1, "eq2": eq2, "url": url}
-            except Exception: pass
-    except Exception as e: print(f"[ERREUR SELENIUM - get_live_scores] {e}")
-    print(f"✅ {len(scores)} scores en direct trouvés.")
-    return scores
+                outbox_message = db.session.get(OutboxMessage, message_id)
+                content = outbox_message.content
+                parents = {}
+                if outbox_message.parent_id:
+                    parents = {d.facebook_page_id: d for d in OutboxDelivery.query.filter_by(message_id=outbox_message.parent_id)}
+
+                targets, by_id = [], {}
+                for delivery in items:
+                    page = pages.get(delivery.facebook_page_id)
+                    if page is None or not page.is_active:
+                        mark_dead(delivery, "page supprimée ou désactivée")
+                        continue
+                    # Circuit ouvert : aucun appel, la sonde en arrière-plan décide de la reprise
+                    if circuit := breaker.blocked(page.facebook_page_id, page.encrypted_page_access_token):
+                        if circuit.kind == PERMANENT:
+                            mark_dead(delivery, f"page à reconnecter : {circuit.last_error}")
+                        else:
+                            # Pas avant le passage de la sonde : sans elle, l'envoi serait réservé puis repoussé à chaque tour
+                            delivery.next_attempt_at = max(circuit.retry_at, datetime.utcnow() + timedelta(seconds=CIRCUIT_PROBE_INTERVAL_SECONDS))
+                        continue
+                    post_id = None
+                    # Une édition attend la publication d'origine, et n'est jamais envoyée sans son ID de post
+                    if outbox_message.parent_id and (post_id := resolve_edit(delivery, parents.get(delivery.facebook_page_id))) is None:
+                        continue
+                    by_id[delivery.id] = delivery
+                    targets.append((delivery.id, PageTarget(page.facebook_page_id, page.page_name, page.encrypted_page_access_token), post_id))
+
+                send, send_grouped = make_graph_senders(page_clients, content, config['GRAPH_API_BASE'])
+                with metrics.span('fanout'):
+                    if config['GRAPH_BATCH_MODE']:
+                        results = get_fanout().broadcast_batched(targets, send_grouped, key=lambda target: target[1].page_id, batch_size=config['GRAPH_BATCH_SIZE'])
+                    else:
+                        results = get_fanout().broadcast(targets, send, key=lambda target: target[1].page_id)
+                log_rows, now = [], datetime.utcnow()
+                for result in results:
+                    delivery, page = by_id[result.target[0]], pages[result.target[1].page_id]
+                    if isinstance(result.error, RateLimited):
+                        # Retenu par la limite de débit locale, Graph n'a pas été appelé : ni tentative ni ligne de journal
+                        postpone(delivery, config['OUTBOX_RATE_LIMIT_DELAY_SECONDS'])
+                        metrics.inc('deliveries_total', status='rate_limited')
+                        continue
+                    if result.error is None:
+                        breaker.record_success(page.facebook_page_id)
+                        mark_sent(delivery, result.result)
+                    else:
+                        kind, opened = breaker.record_failure(page.facebook_page_id, result.error, page.encrypted_page_access_token)
+                        # Une erreur permanente n'est pas retentée : l'envoi est abandonné tout de suite
+                        max_attempts = 1 if kind == PERMANENT else config['OUTBOX_MAX_ATTEMPTS']
+                        mark_failed(delivery, result.error, max_attempts, config['OUTBOX_BACKOFF_SECONDS'], config['OUTBOX_MAX_BACKOFF_SECONDS'])
+                        if opened and kind == PERMANENT: notify_reauthorization(page)
+                        log('outbox.delivery_failed', "Erreur Facebook", level='warning', page=result.target[1].page_name,
+                            attempt=delivery.attempts, status=delivery.status, error_class=kind, error=str(result.error))
+                    row = log_row(delivery, result.latency, result.error, now)
+                    metrics.inc('deliveries_total', status=row['status'])
+                    log_rows.append(row)
+                # Journal de la diffusion en une seule insertion, validé avec l'état des envois
+                write_delivery_log(db.session, log_rows)
+                # Un commit par message : les envois déjà faits sont enregistrés même si un message suivant échoue
+                with metrics.span('outbox_commit'):
+                    db.session.commit()
+                if results:
+                    report = latency_report(results)
+                    log('outbox.dispatched', "Message diffusé", message_id=message_id, served=report['count'] - report['failed'], pages=report['count'],
+                        p50_ms=round(report['p50'] * 1000), p95_ms=round(report['p95'] * 1000), p99_ms=round(report['p99'] * 1000),
+                        token_cache_hits=page_clients.hits, token_cache_misses=page_clients.misses)
+            except Exception as e:
+                db.session.rollback()
+                metrics.error('outbox_message', e)
+                log('outbox.message_failed', "Résultats du message non enregistrés, ses envois seront repris après le bail",
+                    level='error', message_id=message_id, error=str(e))
+
+def probe_open_circuits():
+    """Sonde les pages dont le circuit est ouvert et arrivé à échéance par une lecture Graph légère."""
+    if _app is None or _circuit_breaker is None: return
+    due = _circuit_breaker.due_probes()
+    if not due: return
+    with _app.app_context():
+        pages = {page.facebook_page_id: page for page in FacebookPage.query.filter(FacebookPage.facebook_page_id.in_(due)).all()}
+        page_clients = get_page_clients()
+        for page_id in due:
+            page = pages.get(page_id)
+            if page is None or not page.is_active:
+                _circuit_breaker.forget(page_id)
+                continue
+            try:
+                _, graph = page_clients.get(page_id, page.encrypted_page_access_token)
+                graph.get_object(page_id, fields='id')
+                _circuit_breaker.record_success(page_id)
+                log('circuit.closed', "Page de nouveau joignable, circuit refermé", page=page.page_name)
+            except Exception as e:
+                kind, opened = _circuit_breaker.record_failure(page_id, e, page.encrypted_page_access_token)
+                if opened and kind == PERMANENT: notify_reauthorization(page)
+                log('circuit.probe_failed', "Sonde en échec", level='warning', page=page.page_name, kind=kind, error=str(e))
+        report = _circuit_breaker.report()
+        log('circuit.report', "Circuits ouverts après les sondes", open=report['open'], permanent=report['permanent'],
+            throttled=report['throttled'], transient=report['transient'], skipped=report['skipped'])
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            log('circuit.commit_failed', "État des sondes non enregistré", level='error', error=str(e))
+
+def publish_enriched(active_pages, events, on_published=None):
+    """
+    Publie les événements qui attendent un enrichissement.
+    `events` associe une clé à (message de base, fonction de récupération, arguments, composition).
+    `on_published(clé)` est appelé après chaque publication, y compris quand l'événement,
+    dont l'enrichissement a manqué l'échéance, n'est publié qu'au cycle suivant.
+    """
+    if _app.config['TWO_PHASE_PUBLISH']:
+        for key, (bare_message, fetch, args, compose) in events.items():
+            publish_then_enrich(active_pages, bare_message, fetch, args, compose, scope=f"{key}|{bare_message}")
+            if on_published: on_published(key)
+        return
+    runner = get_enrichment_runner()
+    jobs = {key: (fetch, args) for key, (_, fetch, args, _) in events.items()}
+    with metrics.span('enrichment'):
+        enriched = list(runner.run(jobs, defer=True))
+    for key, result in enriched:
+        broadcast_to_facebook(active_pages, events[key][3](result), scope=f"{key}|{events[key][0]}")
+        if on_published: on_published(key)
+    for key in runner.deferred_keys & jobs.keys():
+        _deferred_posts[key] = (events[key], on_published)
+
+def publish_deferred_posts(active_pages):
+    """Publie en début de cycle les événements reportés par le cycle précédent, enrichis ou non."""
+    if not _deferred_posts: return
+    log('cycle.deferred', "Publication des événements reportés", events=len(_deferred_posts))
+    for key, result in get_enrichment_runner().run_deferred():
+        if (deferred := _deferred_posts.pop(key, None)) is None: continue
+        (bare_message, _, _, compose), on_published = deferred
+        broadcast_to_facebook(active_pages, compose(result), scope=f"{key}|{bare_message}")
+        if on_published: on_published(key)
+
+def queue_post(key, priority, bare_message, fetch=None, args=(), compose=None, scope=None, on_published=None):
+    """
+    Confie une publication à la coalescence ; sans `fetch`, le message part tel quel.
+    Un événement plus récent pour la même clé remplace celui-ci s'il n'est pas encore parti.
+    """
+    get_coalescer().add(key, priority, (bare_message, fetch, args, compose, scope, on_published))
+
+def _join_texts(*parts):
+    return "\n\n".join(part for part in parts if part)
+
+def _compose_both(old_bare, old_compose, new_bare, new_compose, page):
+    return _join_texts(old_compose(page) if old_compose else old_bare, new_compose(page) if new_compose else new_bare)
+
+def _published_both(first, second, key):
+    if first: first(key)
+    if second: second(key)
 
-def get_match_details(driver, match_url):
-    if not match_url: return None, None
+def merge_posts(older, newer):
+    """
+    Fusionne deux publications en attente pour le même match : le texte de l'ancienne (un but par
+    exemple) est gardé et l'état le plus récent est ajouté à la suite. Les deux parties enrichies
+    sont composées depuis la même page du match (celle du plus récent, qui reflète l'état actuel).
+    """
+    old_bare, old_fetch, old_args, old_compose, old_scope, old_done = older
+    new_bare, new_fetch, new_args, new_compose, new_scope, new_done = newer
+    old_compose = old_compose if old_fetch is not None else None
+    new_compose = new_compose if new_fetch is not None else None
+    if new_fetch is not None or old_fetch is not None:
+        fetch, args = (new_fetch, new_args) if new_fetch is not None else (old_fetch, old_args)
+        compose = partial(_compose_both, old_bare, old_compose, new_bare, new_compose)
+    else:
+        fetch, args, compose = None, (), None
+    scope = "|".join(s for s in (old_scope, new_scope) if s) or None
+    on_published = partial(_published_both, old_done, new_done) if old_done or new_done else None
+    return (_join_texts(old_bare, new_bare), fetch, args, compose, scope, on_published)
+
+def publish_coalesced(active_pages):
+    """Publie les événements libérés par la coalescence, les plus prioritaires d'abord."""
+    coalescer = get_coalescer()
+    released = coalescer.release()
+    events, callbacks = {}, {}
+    for post in released:
+        bare_message, fetch, args, compose, scope, on_published = post.payload
+        if fetch is None:
+            broadcast_to_facebook(active_pages, bare_message, scope)
+            if on_published: on_published(post.key)
+        else:
+            events[post.key] = (bare_message, fetch, args, compose)
+            if on_published: callbacks[post.key] = on_published
+    if events:
+        publish_enriched(active_pages, events, on_published=lambda key: callbacks[key](key) if key in callbacks else None)
+    if released or len(coalescer):
+        log('coalescer.released', "Publications libérées par la coalescence", released=len(released), pending=len(coalescer),
+            merged=coalescer.merged, dropped=coalescer.dropped)
+
+def mark_match_published(match_id):
+    try:
+        db.session.add(GlobalPublishedMatch(match_identifier=match_id))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        log('finished.mark_failed', "Match terminé non marqué comme publié", level='error', match_id=match_id, error=str(e))
+
+def get_live_scores(html):
+    """Scores relevés par clé de match, ou None si la page est indisponible ou illisible."""
+    scores = {}
     try:
-        driver.get(match_url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "span.st1.eventTypeG")))
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        for row in reversed(soup.select("tr")):
-            if row.select_one("span.st1.eventTypeG"):
-                buteur = row.select_one("span.st1.eventTypeG").text.strip()
-                minute = row.select_one("td.c2").text.strip()
-                return buteur, minute
-    except Exception: pass
-    return None, None
-    
+        if not html: raise ValueError("page des scores en direct indisponible")
+        with metrics.span('parse'):
+            for match in parse_live_scores(html):
+                scores[state_key(match)] = match
+    except Exception as e:
+        log('scraping.live_failed', "Scores en direct non analysés", level='error', error=str(e))
+        return None
+    log('scraping.live_parsed', "Scores en direct trouvés", matches=len(scores))
+    return scores
+
 def get_stat_url(match_url):
     if not match_url: return None
     return f"{match_url.split('?')[0]}?p=stats"
 
-def get_match_stats(driver, stat_url):
-    if not stat_url: return ""
-    try:
-        driver.get(stat_url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.progressBar")))
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        stats, seen_titles = [], set()
-        for block in soup.select("div.progressBar"):
-            titre_el, v1_el, v2_el = block.select_one("h5.progressHeaderTitle"), block.select_one("span.progressBarValue1"), block.select_one("span.progressBarValue2")
-            if titre_el and v1_el and v2_el and (titre_text := titre_el.text.strip()) not in seen_titles:
-                seen_titles.add(titre_text)
-                stats.append(f"{titre_text} : {v1_el.text.strip()} - {v2_el.text.strip()}")
-        return "\n📊 " + "\n📊 ".join(stats) if stats else ""
-    except Exception as e: print(f"[ERREUR STATS] {e}")
-    return ""
-
-def get_penalty_shootout_score(driver, match_url):
-    if not match_url: return None
+def format_stats(stats):
+    return "\n📊 " + "\n📊 ".join(f"{s.title} : {s.home} - {s.away}" for s in stats) if stats else ""
+
+def load_match_page(match_url, score=None):
+    """
+    Charge l'onglet statistiques du match et en extrait buteur, tirs au but et statistiques.
+    Selenium n'est utilisé que si la requête HTTP échoue ou si la page n'est qu'une coquille JS ;
+    les éléments absents sont constatés sur le HTML analysé, sans attendre de délai, et comptés dans les métriques.
+    """
+    fetcher = get_fetcher()
     try:
-        driver.get(match_url)
-        WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.XPATH, "//td[contains(text(), 'Penalties')]")))
-        penalty_cell = BeautifulSoup(driver.page_source, "html.parser").find("td", string=lambda text: "Penalties" in text if text else False)
-        if penalty_cell and (score_tag := penalty_cell.find("b")):
-            return f"Tirs au but : {score_tag.text.strip()}"
-    except Exception: pass
-    return None
+        html = fetcher.fetch(get_stat_url(match_url), MATCH_PAGE_SELECTOR, wait=10)
+        if not html:
+            metrics.inc('enrichment_misses_total', part='page')
+            log('enrichment.page_missing', "Page de match indisponible", level='warning', url=match_url)
+            return None
+        page = parse_match_page(html)
+        if not page.stats:
+            metrics.inc('enrichment_misses_total', part='stats')
+            log('enrichment.stats_missing', "Statistiques absentes de la page de match", level='warning', url=match_url)
+        # Si l'onglet ne porte pas la chronologie alors que des buts ont été marqués, on lit la page principale
+        if page.last_goal is None and score and score != "0-0":
+            if main_html := fetcher.fetch(match_url, MATCH_PAGE_SELECTOR, wait=10):
+                main_page = parse_match_page(main_html)
+                page = page._replace(last_goal=main_page.last_goal, penalties=page.penalties or main_page.penalties)
+            if page.last_goal is None:
+                metrics.inc('enrichment_misses_total', part='scorer')
+                log('enrichment.scorer_missing', "Buteur absent de la page de match", level='warning', url=match_url, score=score)
+        return page
+    except Exception as e:
+        metrics.error('enrichment_fetch', e)
+        log('enrichment.failed', "Page de match non analysée", level='error', url=match_url, error=str(e))
+        return None
+
+def get_match_enrichment(match_id, match_url, score=None):
+    return get_match_cache().get(match_id, match_url, score)
 
 def get_article_content(driver, article_url):
     try:
@@ -143,7 +772,7 @@ def get_article_content(driver, article_url):
         content = WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "#cont12 p.par1"))).get_attribute('innerText').strip()
         return content[:1500] + "..." if len(content) > 1500 else content
     except Exception as e:
-        print(f"   -> Avertissement: Impossible de scraper le contenu de {article_url}. Erreur: {e}")
+        log('news.article_failed', "Contenu de l'article non récupéré", level='warning', url=article_url, error=str(e))
         return None
 
 # def scrape_football_news(driver):
@@ -172,97 +801,171 @@ def get_article_content(driver, article_url):
 # === TÂCHES PLANIFIÉES =======================================================
 # =============================================================================
 
+def format_goal_message(new_data, equipe_but, buteur, minute_but):
+    minute_affiche = minute_but or new_data.minute
+    msg_buteur = f"🚀 Buuuut de {equipe_but} !"
+    if buteur:
+        if buteur.startswith('('): pass
+        elif '(' in buteur: msg_buteur = f"🚀 Buuuut de {buteur.split('(')[0].strip()} 🔥 ({equipe_but}) !"
+        else: msg_buteur = f"🚀 Buuuut de {buteur} ({equipe_but}) !"
+    return f"{msg_buteur}\n⏱️ {minute_affiche}\n{new_data.eq1} {new_data.score} {new_data.eq2}"
+
+def compose_goal_message(new_data, equipe_but, page):
+    goal = page.last_goal if page else None
+    return format_goal_message(new_data, equipe_but, goal.scorer if goal else None, goal.minute if goal else None)
+
+def compose_with_stats(message, page):
+    stats = format_stats(page.stats) if page else ""
+    return f"{message}\n\n{stats}".strip()
+
+def compose_finished_message(message, page):
+    if page and page.penalties: message += f"\nTirs au but : {page.penalties}"
+    return compose_with_stats(message, page)
+
+def process_live_scores(active_pages, live_html):
+    """Compare les scores en direct à l'état en mémoire, publie les événements et planifie l'instantané en base."""
+    new_scores_data = get_live_scores(live_html)
+    if not new_scores_data:
+        # Relevé vide ou en échec : l'état connu est gardé pour ne pas republier chaque match au relevé suivant
+        log('scraping.live_skipped', "Aucun score relevé, état des matchs conservé", level='warning')
+        publish_coalesced(active_pages)
+        return
+    with metrics.span('diff'):
+        detected = get_match_store().apply(new_scores_data.values())
+    metrics.set('matches_live', len(new_scores_data))
+
+    # Les événements passent par la coalescence : un seul message par match, les buts d'abord.
+    # Les buts et mi-temps attendent leur enrichissement, lancé en parallèle à la publication.
+    goals = 0
+    for event in detected:
+        new_data, match_key = event.match, state_key(event.match)
+        metrics.inc('events_total', kind=event.kind)
+        if event.kind == KICKOFF:
+            queue_post(match_key, KICKOFF_PRIORITY, f"⏱️ {new_data.minute}\n{new_data.eq1} {new_data.score} {new_data.eq2}")
+        elif event.kind == HALF_TIME:
+            bare_message = f"⏸️ Mi-temps\n{new_data.eq1} {new_data.score} {new_data.eq2}"
+            queue_post(match_key, HALF_TIME_PRIORITY, bare_message, get_match_enrichment, (new_data.match_id, new_data.url, new_data.score),
+                       partial(compose_with_stats, bare_message))
+        elif event.kind == GOAL:
+            goals += 1
+            queue_post(match_key, GOAL_PRIORITY, format_goal_message(new_data, event.team, None, None), get_match_enrichment,
+                       (new_data.match_id, new_data.url, new_data.score), partial(compose_goal_message, new_data, event.team))
+        elif event.kind == DISALLOWED_GOAL:
+            queue_post(match_key, GOAL_PRIORITY, f"❌ BUT REFUSÉ...\n\nLe score revient à {new_data.eq1} {new_data.score} {new_data.eq2}",
+                       scope=f"{match_key}|{new_data.minute}")
+        # FULL_TIME : publié depuis la page des matchs terminés, avec les tirs au but
+
+    get_poller().observe(new_scores_data.values(), goals=goals)
+    publish_coalesced(active_pages)
+
+    # Après un événement, l'état est écrit tout de suite pour ne pas republier en cas de redémarrage
+    flush_match_state(force=bool(detected))
+
 def run_centralized_checks():
     if _app is None: return
+    # Seul le leader scrape et publie ; les autres workers restent prêts à reprendre le bail
+    if not is_scraping_leader(): return
+    # Un seul cycle à la fois : un déclenchement pendant un cycle lent est ignoré et compté
+    cycle = get_scores_cycle()
+    if cycle.run(_run_scores_cycle, get_poller().current_interval):
+        report = cycle.report()
+        log('cycle.stats', "Durées des cycles des scores", runs=report['runs'], p50_seconds=round(report['p50'], 2), p95_seconds=round(report['p95'], 2),
+            max_seconds=round(report['max'], 2), overruns=report['overruns'], overrun_seconds=round(report['overrun_seconds'], 1),
+            deadline_misses=report['deadline_misses'], skipped=report['skipped'])
+    else:
+        metrics.inc('cycles_skipped_total', job='scores')
+
+def _run_scores_cycle():
     with _app.app_context():
-        start_time = time.time()
-        print(f"\n--- [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Démarrage du cycle de vérification des scores ---")
-        
-        active_pages = db.session.query(FacebookPage).join(User).filter(
-            FacebookPage.is_active == True,
-            db.or_(User.role == 'superadmin', User.subscription_status == 'active', User.trial_ends_at > datetime.utcnow())
-        ).all()
-        if not active_pages: print("Aucune page éligible pour la publication.")
+        start_time, start_cpu = time.time(), time.process_time()
+        metrics.inc('cycles_total', job='scores')
+        log('cycle.started', "Démarrage du cycle de vérification des scores")
 
-        driver = get_browser()
-        if not driver: return
+        active_pages = get_eligible_pages()
+        if not active_pages: log('cycle.no_pages', "Aucune page éligible pour la publication.")
+
+        fetcher = get_fetcher()
+        cycle = get_scores_cycle()
+        # L'enrichissement doit se terminer avant l'échéance du cycle
+        get_enrichment_runner().start_cycle(min(_app.config['ENRICHMENT_BUDGET_SECONDS'], cycle.remaining()))
 
         try:
-            old_scores_from_db = GlobalMatchState.query.all()
-            old_scores = {s.match_key: s for s in old_scores_from_db}
-            new_scores_data = get_live_scores(driver)
-            
-            for match_key, new_data in new_scores_data.items():
-                old_state = old_scores.get(match_key)
-                if not old_state:
-                    if new_data['score'].replace(" ","") != "-" and "'" in new_data['minute']:
-                        broadcast_to_facebook(active_pages, f"⏱️ {new_data['minute']}\n{new_data['eq1']} {new_data['score']} {new_data['eq2']}")
-                    continue
-
-                if new_data['statut'] == "MT" and old_state.statut != "MT":
-                    msg = f"⏸️ Mi-temps\n{new_data['eq1']} {new_data['score']} {new_data['eq2']}"
-                    stats = get_match_stats(driver, get_stat_url(new_data['url']))
-                    broadcast_to_facebook(active_pages, f"{msg}\n\n{stats}".strip())
-                elif new_data['score'] != old_state.score:
-                    try:
-                        s1_old, s2_old = map(int, old_state.score.replace(" ","").split("-"))
-                        s1_new, s2_new = map(int, new_data['score'].replace(" ","").split("-"))
-                        if s1_new > s1_old or s2_new > s2_old:
-                            equipe_but = new_data['eq1'] if s1_new > s1_old else new_data['eq2']
-                            buteur, minute_but = get_match_details(driver, new_data['url'])
-                            minute_affiche = minute_but or new_data['minute']
-                            msg_buteur = f"🚀 Buuuut de {equipe_but} !"
-                            if buteur:
-                                if buteur.startswith('('): pass
-                                elif '(' in buteur: msg_buteur = f"🚀 Buuuut de {buteur.split('(')[0].strip()} 🔥 ({equipe_but}) !"
-                                else: msg_buteur = f"🚀 Buuuut de {buteur} ({equipe_but}) !"
-                            broadcast_to_facebook(active_pages, f"{msg_buteur}\n⏱️ {minute_affiche}\n{new_data['eq1']} {new_data['score']} {new_data['eq2']}")
-                        elif s1_new < s1_old or s2_new < s2_old:
-                            broadcast_to_facebook(active_pages, f"❌ BUT REFUSÉ...\n\nLe score revient à {new_data['eq1']} {new_data['score']} {new_data['eq2']}")
-                    except (ValueError, IndexError): continue
-            
-            # Mise à jour BDD scores
-            current_keys = set(new_scores_data.keys())
-            for state in old_scores_from_db:
-                if state.match_key not in current_keys: db.session.delete(state)
-            for match_key, data in new_scores_data.items():
-                state = old_scores.get(match_key)
-                if state: state.score, state.statut, state.minute, state.url, state.eq1, state.eq2 = data['score'], data['statut'], data['minute'], data['url'], data['eq1'], data['eq2']
-                else: db.session.add(GlobalMatchState(match_key=match_key, **data))
-            db.session.commit()
+            publish_deferred_posts(active_pages)
+
+            with metrics.span('live_fetch'):
+                live_html = fetcher.fetch(LIVE_URL, "td.lm3", wait=15, conditional=True)
+            unchanged, fingerprint = _live_page_tracker.is_unchanged(LIVE_URL, live_html) if live_html else (False, None)
+            if not live_html:
+                log('scraping.live_unavailable', "Page des scores indisponible, analyse ignorée ce cycle", level='warning')
+            elif unchanged:
+                log('scraping.live_unchanged', "Page des scores inchangée, analyse ignorée", skip_rate=round(_live_page_tracker.skip_rate, 3))
+            else:
+                try:
+                    process_live_scores(active_pages, live_html)
+                    if fingerprint: _live_page_tracker.mark_processed(LIVE_URL, fingerprint)
+                except Exception:
+                    # La prochaine version de la page doit être retraitée, même si le serveur la dit inchangée
+                    _live_page_tracker.forget(LIVE_URL)
+                    if hasattr(fetcher, 'forget'): fetcher.forget(LIVE_URL)
+                    raise
+
+            if cycle.expired():
+                publish_coalesced(active_pages)
+                log('cycle.deadline', "Échéance atteinte, matchs terminés vérifiés au prochain cycle.", level='warning')
+                return
 
             # Traitement des matchs terminés
-            previously_published_ids = {p.match_identifier for p in GlobalPublishedMatch.query.all()}
-            driver.get(FINISHED_URL)
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, "tr[data-matchid]")))
-            for row in BeautifulSoup(driver.page_source, "html.parser").select("tr[data-matchid]"):
-                if "TER" in (row.select_one("td.lm2").text or "") and (match_id := row['data-matchid']) not in previously_published_ids:
-                    try:
-                        eq1, eq2, score = row.select_one("span.lm3_eq1").text.strip(), row.select_one("span.lm3_eq2").text.strip(), row.select_one("span.lm3_score").text.strip()
-                        url = f"https://www.matchendirect.fr{row.select_one('a.ga4-matchdetail').get('href')}"
-                        msg = f"🔚 Terminé\n{eq1} {score} {eq2}"
-                        if (penalty_text := get_penalty_shootout_score(driver, url)): msg += f"\n{penalty_text}"
-                        stats = get_match_stats(driver, get_stat_url(url))
-                        broadcast_to_facebook(active_pages, f"{msg}\n\n{stats}".strip())
-                        db.session.add(GlobalPublishedMatch(match_identifier=match_id))
-                        db.session.commit()
-                    except Exception as e: 
-                        print(f"❌ Erreur match terminé {match_id}: {e}"); db.session.rollback()
+            with metrics.span('finished_scan'):
+                finished_html = fetcher.fetch(FINISHED_URL, "tr[data-matchid]", wait=15)
+                if not finished_html: raise ValueError("page des matchs terminés indisponible")
+                # La page du jour sert aussi de calendrier : on relève les coups d'envoi une fois par jour
+                if get_poller().needs_fixtures():
+                    today = datetime.now(FIXTURE_TIMEZONE).date()
+                    get_poller().set_fixtures(parse_fixtures(finished_html, today, FIXTURE_TIMEZONE), today)
+                    log('polling.fixtures', "Calendrier du jour relevé", fixtures=len(get_poller().fixtures))
+                finished_matches = {f.match_id: f for f in parse_finished_matches(finished_html)}
+                # Seuls les IDs présents sur la page sont vérifiés, l'historique n'est pas relu
+                new_ids = unpublished_ids(db.session, finished_matches)
+            to_publish = {match_id: f for match_id, f in finished_matches.items() if match_id in new_ids}
+            metrics.inc('matches_finished_total', len(to_publish))
+            for match_id, finished in to_publish.items():
+                if match_id in get_coalescer(): continue  # déjà en attente de publication
+                bare_message = f"🔚 Terminé\n{finished.eq1} {finished.score} {finished.eq2}"
+                queue_post(match_id, FULL_TIME_PRIORITY, bare_message, get_match_enrichment, (match_id, finished.url, finished.score),
+                           partial(compose_finished_message, bare_message), on_published=mark_match_published)
+            publish_coalesced(active_pages)
         except Exception as e:
-            print(f"ERREUR MAJEURE dans run_centralized_checks: {e}"); db.session.rollback()
+            metrics.error('cycle', e)
+            log('cycle.failed', "Erreur majeure dans le cycle des scores", level='error', error=str(e)); db.session.rollback()
         finally:
-            driver.quit()
-            print(f"--- Cycle scores terminé en {time.time() - start_time:.2f}s ---")
+            log_fetcher_cycle()
+            schedule_next_cycle(time.process_time() - start_cpu)
+            duration = time.time() - start_time
+            metrics.observe('phase_seconds', duration, phase='cycle')
+            log('cycle.finished', "Cycle des scores terminé", duration_seconds=round(duration, 3))
 
 # app/tasks.py
 
 # ... (le reste de vos imports et fonctions) ...
 
+def mark_summary_published(summary_hash, key=None):
+    try:
+        state = GlobalState.query.filter_by(key='last_summary_hash').first()
+        if state:
+            state.value = summary_hash
+        else:
+            db.session.add(GlobalState(key='last_summary_hash', value=summary_hash))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        log('summary.hash_failed', "Hash du résumé non enregistré, il pourra être republié", level='error', error=str(e))
+
 def post_live_scores_summary():
-    if _app is None: return
-    with _app.app_context():
+    if _app is None or not is_scraping_leader(): return
+    metrics.inc('cycles_total', job='summary')
+    with _app.app_context(), metrics.span('summary'):
         start_time = time.time() # S'assurer que start_time est défini pour le log de fin
-        print(f"\n--- [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Démarrage du résumé des scores ---")
+        log('summary.started', "Démarrage du résumé des scores")
         
         scores_from_db = GlobalMatchState.query.all()
         
@@ -270,7 +973,7 @@ def post_live_scores_summary():
         current_summary_list = sorted([f"{s.match_key}:{s.score}" for s in scores_from_db if s.statut != "TER"])
         
         if not current_summary_list:
-            print("Aucun match en cours à résumer. Aucune publication.");
+            log('summary.skipped', "Aucun match en cours à résumer. Aucune publication.")
             # Si le dernier hash existe et qu'il n'y a plus de matchs, on peut envisager de le réinitialiser
             # pour publier un message vide ou de fin si vous le souhaitez.
             # Pour l'instant, on ne fait rien s'il n'y a pas de matchs.
@@ -281,20 +984,17 @@ def post_live_scores_summary():
         last_hash = last_hash_obj.value if last_hash_obj else ''
 
         if current_hash == last_hash:
-            print("Résumé des scores inchangé, aucune publication."); return
+            log('summary.skipped', "Résumé des scores inchangé, aucune publication."); return
         
-        active_pages = db.session.query(FacebookPage).join(User).filter(
-            FacebookPage.is_active == True,
-            db.or_(User.role == 'superadmin', User.subscription_status == 'active', User.trial_ends_at > datetime.utcnow())
-        ).all()
+        active_pages = get_eligible_pages()
         if not active_pages:
-            print("Aucune page éligible pour la publication du résumé.");
+            log('summary.skipped', "Aucune page éligible pour la publication du résumé.")
             return
 
         message = "📊 Scores en direct :\n\n"
         
         # On trie pour avoir un ordre cohérent dans la publication
-        for s in sorted(scores_from_db, key=lambda x: x.match_key):
+        for s in sorted(scores_from_db, key=lambda x: (x.eq1 or '', x.eq2 or '')):
             if s.statut != "TER": # On ne publie que les matchs qui ne sont PAS terminés
                 # Initialisation de la ligne du match
                 ligne = f"◉ {s.eq1} {s.score} {s.eq2}"
@@ -314,17 +1014,12 @@ def post_live_scores_summary():
         
         # Assurez-vous d'avoir au moins un message non vide avant de publier
         if message.strip() != "📊 Scores en direct :":
-            broadcast_to_facebook(active_pages, message.strip())
-
-            # Mise à jour du hash seulement si un message a été publié
-            if last_hash_obj:
-                last_hash_obj.value = current_hash
-            else:
-                db.session.add(GlobalState(key='last_summary_hash', value=current_hash))
-            db.session.commit()
-            print(f"--- Publication du résumé terminée en {time.time() - start_time:.2f}s ---")
+            # Publié par le prochain cycle des scores, après les événements plus prioritaires.
+            # Le hash n'est enregistré qu'à la publication : un résumé abandonné à son échéance sera reproposé
+            queue_post('summary', SUMMARY_PRIORITY, message.strip(), on_published=partial(mark_summary_published, current_hash))
+            log('summary.queued', "Résumé mis en attente de publication", duration_seconds=round(time.time() - start_time, 3))
         else:
-            print("Résumé des scores vide (après filtrage), aucune publication.");
+            log('summary.skipped', "Résumé des scores vide (après filtrage), aucune publication.")
             # Si le hash était différent mais qu'aucun match n'est finalement publié,
             # on pourrait vouloir mettre à jour le hash pour éviter de spammer
             # avec un message vide, ou le laisser pour le forcer plus tard.
@@ -340,6 +1035,7 @@ def check_expired_subscriptions():
             user.subscription_status = 'inactive'
             user.subscription_plan = None
         db.session.commit()
+        invalidate_eligible_pages()
 
 # def publish_news_for_business_users():
 #     if _app is None: return
@@ -372,6 +1068,22 @@ def check_expired_subscriptions():
 #             driver.quit()
 #             print(f"--- Publication des actualités terminée en {time.time() - start_time:.2f}s ---")
 
+def prune_published_matches():
+    if _app is None: return
+    with _app.app_context():
+        try:
+            deleted = prune_published(db.session, _app.config['PUBLISHED_MATCH_RETENTION_DAYS'])
+            deliveries, messages = prune_outbox(db.session, _app.config['OUTBOX_RETENTION_DAYS'])
+            logged = prune_delivery_log(db.session, _app.config['DELIVERY_LOG_RETENTION_DAYS'])
+            prune_publisher_nodes(db.session)
+            db.session.commit()
+            log('retention.pruned', "Anciennes lignes supprimées", published_matches=deleted, outbox_deliveries=deliveries,
+                outbox_messages=messages, delivery_log=logged, published_match_days=_app.config['PUBLISHED_MATCH_RETENTION_DAYS'],
+                outbox_days=_app.config['OUTBOX_RETENTION_DAYS'], delivery_log_days=_app.config['DELIVERY_LOG_RETENTION_DAYS'])
+        except Exception as e:
+            db.session.rollback()
+            log('retention.failed', "Purge non effectuée", level='error', error=str(e))
+
 def charge_with_fedapay_token(user, plan_info):
     api_base_url = _app.config['FEDAPAY_API_BASE']
     api_key = _app.config['FEDAPAY_SECRET_KEY']
@@ -383,16 +1095,16 @@ def charge_with_fedapay_token(user, plan_info):
         response.raise_for_status()
         return response.json()['v1/transaction']['status'] == 'approved'
     except Exception as e:
-        print(f"ERREUR de renouvellement Fedapay pour {user.email}: {e}")
+        log('billing.renewal_failed', "Renouvellement Fedapay refusé", level='error', user_id=user.id, error=str(e))
         return False
 
 def run_daily_renewals():
     if _app is None: return
     with _app.app_context():
-        print(f"\n--- Démarrage des renouvellements Fedapay ---")
+        log('billing.renewals_started', "Démarrage des renouvellements Fedapay")
         today = date.today()
         users_to_renew = User.query.filter(User.subscription_provider == 'fedapay', User.next_billing_date == today).all()
-        if not users_to_renew: print("Aucun renouvellement Fedapay aujourd'hui."); return
+        if not users_to_renew: log('billing.renewals_skipped', "Aucun renouvellement Fedapay aujourd'hui."); return
 
         for user in users_to_renew:
             plan_id_to_renew = user.subscription_plan # Utilise le plan complet stocké, ex: 'pro_annual'
@@ -408,14 +1120,40 @@ def run_daily_renewals():
             else:
                 user.subscription_status, user.subscription_plan, user.next_billing_date = 'inactive', None, None
         db.session.commit()
-        print("--- Renouvellements Fedapay terminés ---")
+        invalidate_eligible_pages()
+        log('billing.renewals_finished', "Renouvellements Fedapay terminés", users=len(users_to_renew))
 
 # =============================================================================
 # === ENREGISTREMENT DES TÂCHES ===============================================
 # =============================================================================
 
-scheduler.add_job(id='centralized_checks_job', func=run_centralized_checks, trigger='interval', seconds=8, replace_existing=True)
+# Tâches de chaque rôle du worker ; les rôles ne communiquent que par la base (file d'envoi, GlobalState)
+ROLE_JOBS = {
+    'scraper': ('leader_lease_job', 'centralized_checks_job', 'live_summary_job', 'prune_published_matches_job'),
+    'publisher': ('publisher_heartbeat_job', 'outbox_dispatch_job', 'circuit_probe_job'),
+    'billing': ('check_expired_job', 'fedapay_renewal_job'),
+}
+
+def configure_roles(roles):
+    """Retire de l'ordonnanceur (avant son démarrage) les tâches des rôles que ce processus n'exécute pas."""
+    kept = {job_id for role in roles for job_id in ROLE_JOBS[role]}
+    for job_id in {job_id for jobs in ROLE_JOBS.values() for job_id in jobs} - kept:
+        scheduler.remove_job(job_id)
+
+scheduler.add_job(id='leader_lease_job', func=leader_heartbeat, trigger='interval', seconds=10,
+                  max_instances=1, coalesce=True, replace_existing=True, next_run_time=datetime.now())
+# Intervalle de départ : il est ensuite ajusté après chaque cycle par l'AdaptivePoller
+scheduler.add_job(id='centralized_checks_job', func=run_centralized_checks, trigger='interval', seconds=8,
+                  max_instances=1, coalesce=True, replace_existing=True)
+# La file d'envoi est vidée à part : une publication lente ne retarde plus le scraping
+scheduler.add_job(id='publisher_heartbeat_job', func=publisher_heartbeat, trigger='interval', seconds=10,
+                  max_instances=1, coalesce=True, replace_existing=True)
+scheduler.add_job(id='outbox_dispatch_job', func=dispatch_outbox, trigger='interval', seconds=2,
+                  max_instances=1, coalesce=True, replace_existing=True)
+scheduler.add_job(id='circuit_probe_job', func=probe_open_circuits, trigger='interval', seconds=CIRCUIT_PROBE_INTERVAL_SECONDS,
+                  max_instances=1, coalesce=True, replace_existing=True)
 scheduler.add_job(id='check_expired_job', func=check_expired_subscriptions, trigger='cron', hour=1, minute=5, replace_existing=True)
 #scheduler.add_job(id='publish_news_job', func=publish_news_for_business_users, trigger='interval', minutes=15, replace_existing=True)
 scheduler.add_job(id='live_summary_job', func=post_live_scores_summary, trigger='interval', minutes=30, replace_existing=True)
+scheduler.add_job(id='prune_published_matches_job', func=prune_published_matches, trigger='cron', hour=3, minute=15, replace_existing=True)
 scheduler.add_job(id='fedapay_renewal_job', func=run_daily_renewals, trigger='cron', hour=2, replace_existing=True)
\ No newline at end of file
@@ -0,0 +1,52 @@
+# app/token_cache.py
+# Jetons de page déchiffrés et clients Graph prêts à l'emploi, gardés en mémoire par processus.
+
+import threading
+import time
+
+
+class PageClientCache:
+    """
+    Associe (ID de page, jeton chiffré) au jeton en clair et à son client Graph.
+    Le chiffré fait partie de la clé : une page reconnectée (nouveau jeton) n'est jamais
+    servie avec l'ancien. Les entrées expirent après `ttl` secondes.
+    Aucune invalidation n'est nécessaire depuis le site web (autre processus) : le dispatcher relit
+    la page en base à chaque lot, met à l'écart les envois d'une page supprimée ou désactivée
+    (`is_active`) et présente le chiffré courant, qui sert de clé.
+    """
+
+    def __init__(self, decrypt, make_client, ttl=3600):
+        self._decrypt = decrypt
+        self._make_client = make_client
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_id, encrypted_token):
+        """Retourne (jeton en clair, client Graph)."""
+        key = (page_id, encrypted_token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+        # Déchiffrement hors du verrou : deux workers peuvent le faire en même temps, sans conséquence
+        access_token = self._decrypt(encrypted_token)
+        client = self._make_client(access_token)
+        with self._lock:
+            # Un seul chiffré par page (l'ancien jeton d'une page reconnectée est oublié) ; on purge les entrées expirées
+            for old_key in [k for k, e in self._entries.items() if (k[0] == page_id and k != key) or e[0] <= now]:
+                del self._entries[old_key]
+            self._entries[key] = (now + self.ttl, access_token, client)
+        return access_token, client
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -31,6 +31,73 @@ def get_config():
         'FEDAPAY_ENV': os.environ.get('FEDAPAY_ENV'),
         'FEDAPAY_API_BASE': os.environ.get('FEDAPAY_API_BASE'),
         'FEDAPAY_WEBHOOK_SECRET': os.environ.get('FEDAPAY_WEBHOOK_SECRET'),
+        'SCRAPER_FETCH_MODE': os.environ.get('SCRAPER_FETCH_MODE') or 'http',
+        'HTTP_POOL_SIZE': int(os.environ.get('HTTP_POOL_SIZE') or 10),
+        'ENRICHMENT_WORKERS': int(os.environ.get('ENRICHMENT_WORKERS') or 4),
+        'ENRICHMENT_BUDGET_SECONDS': float(os.environ.get('ENRICHMENT_BUDGET_SECONDS') or 15),
+        'MATCH_CACHE_TTL_SECONDS': int(os.environ.get('MATCH_CACHE_TTL_SECONDS') or 300),
+        # Publie le score tout de suite, puis édite le post avec le buteur / les statistiques
+        'TWO_PHASE_PUBLISH': os.environ.get('TWO_PHASE_PUBLISH') is not None,
+        'POLL_BASE_SECONDS': int(os.environ.get('POLL_BASE_SECONDS') or 8),
+        'POLL_FAST_SECONDS': int(os.environ.get('POLL_FAST_SECONDS') or 5),
+        'POLL_HALF_TIME_SECONDS': int(os.environ.get('POLL_HALF_TIME_SECONDS') or 30),
+        'POLL_IDLE_SECONDS': int(os.environ.get('POLL_IDLE_SECONDS') or 600),
+        # Échéance d'un cycle de scores : l'enrichissement qui la manque est reporté au cycle suivant
+        'CYCLE_DEADLINE_SECONDS': float(os.environ.get('CYCLE_DEADLINE_SECONDS') or 20),
+        # Délai maximal entre deux instantanés de l'état des matchs en base (immédiat après un événement)
+        'MATCH_STATE_FLUSH_SECONDS': int(os.environ.get('MATCH_STATE_FLUSH_SECONDS') or 30),
+        'PUBLISHED_MATCH_RETENTION_DAYS': int(os.environ.get('PUBLISHED_MATCH_RETENTION_DAYS') or 30),
+        # Diffusion Facebook : débits en publications par seconde, par page et pour l'application
+        'FANOUT_WORKERS': int(os.environ.get('FANOUT_WORKERS') or 16),
+        'FANOUT_PAGE_RATE': float(os.environ.get('FANOUT_PAGE_RATE') or 0.5),
+        'FANOUT_PAGE_BURST': int(os.environ.get('FANOUT_PAGE_BURST') or 3),
+        'FANOUT_APP_RATE': float(os.environ.get('FANOUT_APP_RATE') or 50),
+        'FANOUT_APP_BURST': int(os.environ.get('FANOUT_APP_BURST') or 50),
+        'FANOUT_MAX_WAIT_SECONDS': float(os.environ.get('FANOUT_MAX_WAIT_SECONDS') or 30),
+        'PAGE_TOKEN_CACHE_TTL_SECONDS': int(os.environ.get('PAGE_TOKEN_CACHE_TTL_SECONDS') or 3600),
+        # Ralentissement des envois au-delà de ce pourcentage des en-têtes X-App-Usage / X-Page-Usage
+        'FANOUT_USAGE_SLOWDOWN_PERCENT': int(os.environ.get('FANOUT_USAGE_SLOWDOWN_PERCENT') or 50),
+        # Disjoncteur par page : échecs temporaires avant ouverture, pauses (doublées à chaque réouverture)
+        'CIRCUIT_FAILURE_THRESHOLD': int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD') or 3),
+        'CIRCUIT_OPEN_SECONDS': int(os.environ.get('CIRCUIT_OPEN_SECONDS') or 60),
+        'CIRCUIT_MAX_OPEN_SECONDS': int(os.environ.get('CIRCUIT_MAX_OPEN_SECONDS') or 1800),
+        'CIRCUIT_THROTTLE_SECONDS': int(os.environ.get('CIRCUIT_THROTTLE_SECONDS') or 300),
+        'CIRCUIT_REAUTH_PROBE_SECONDS': int(os.environ.get('CIRCUIT_REAUTH_PROBE_SECONDS') or 900),
+        # File d'envoi : taille des lots, bail de réservation, reprises (base doublée à chaque échec)
+        'OUTBOX_BATCH_SIZE': int(os.environ.get('OUTBOX_BATCH_SIZE') or 500),
+        'OUTBOX_LEASE_SECONDS': int(os.environ.get('OUTBOX_LEASE_SECONDS') or 120),
+        'OUTBOX_MAX_ATTEMPTS': int(os.environ.get('OUTBOX_MAX_ATTEMPTS') or 6),
+        'OUTBOX_BACKOFF_SECONDS': float(os.environ.get('OUTBOX_BACKOFF_SECONDS') or 5),
+        'OUTBOX_MAX_BACKOFF_SECONDS': float(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS') or 600),
+        # Envoi retenu par la limite de débit locale : replanifié après ce délai, sans compter de tentative
+        'OUTBOX_RATE_LIMIT_DELAY_SECONDS': float(os.environ.get('OUTBOX_RATE_LIMIT_DELAY_SECONDS') or 15),
+        'OUTBOX_RETENTION_DAYS': int(os.environ.get('OUTBOX_RETENTION_DAYS') or 7),
+        'DELIVERY_LOG_RETENTION_DAYS': int(os.environ.get('DELIVERY_LOG_RETENTION_DAYS') or 30),
+        # Adresse de la Graph API (remplaçable par un serveur de test) et envoi groupé (50 opérations max)
+        'GRAPH_API_BASE': os.environ.get('GRAPH_API_BASE') or 'https://graph.facebook.com',
+        'GRAPH_BATCH_MODE': os.environ.get('GRAPH_BATCH_MODE') is not None,
+        'GRAPH_BATCH_SIZE': min(50, int(os.environ.get('GRAPH_BATCH_SIZE') or 50)),
+        # Fréquence de lecture de la version d'éligibilité publiée par le site (changements faits dans un autre processus)
+        'ELIGIBILITY_VERSION_CHECK_SECONDS': int(os.environ.get('ELIGIBILITY_VERSION_CHECK_SECONDS') or 30),
+        # Coalescence des publications : fenêtre de fusion par match, budget global, échéances des événements secondaires
+        'COALESCE_WINDOW_SECONDS': float(os.environ.get('COALESCE_WINDOW_SECONDS') or 0),
+        'COALESCE_BURST_BUDGET': int(os.environ.get('COALESCE_BURST_BUDGET') or 30),
+        'COALESCE_BURST_SECONDS': int(os.environ.get('COALESCE_BURST_SECONDS') or 60),
+        'COALESCE_HALF_TIME_DEADLINE_SECONDS': int(os.environ.get('COALESCE_HALF_TIME_DEADLINE_SECONDS') or 600),
+        'COALESCE_KICKOFF_DEADLINE_SECONDS': int(os.environ.get('COALESCE_KICKOFF_DEADLINE_SECONDS') or 120),
+        'COALESCE_SUMMARY_DEADLINE_SECONDS': int(os.environ.get('COALESCE_SUMMARY_DEADLINE_SECONDS') or 300),
+        # Worker : port du contrôle de santé (0 pour le désactiver), délai de vie, attente des tâches à l'arrêt
+        'WORKER_HEALTH_PORT': int(os.environ.get('WORKER_HEALTH_PORT') or 8081),
+        'WORKER_LIVENESS_SECONDS': int(os.environ.get('WORKER_LIVENESS_SECONDS') or 60),
+        'WORKER_DRAIN_SECONDS': int(os.environ.get('WORKER_DRAIN_SECONDS') or 45),
+        # Bail du scraper leader (renouvelé toutes les 10 s) : un worker en attente le reprend après expiration
+        'LEADER_LEASE_SECONDS': int(os.environ.get('LEADER_LEASE_SECONDS') or 30),
+        # Publishers : un nœud sans battement depuis ce délai sort de l'anneau et ses pages sont redistribuées
+        'PUBLISHER_NODE_TTL_SECONDS': int(os.environ.get('PUBLISHER_NODE_TTL_SECONDS') or 30),
+        'PUBLISHER_RING_REPLICAS': int(os.environ.get('PUBLISHER_RING_REPLICAS') or 100),
+        'BROWSER_POOL_SIZE': int(os.environ.get('BROWSER_POOL_SIZE') or 2),
+        'BROWSER_MAX_PAGE_LOADS': int(os.environ.get('BROWSER_MAX_PAGE_LOADS') or 150),
+        'BROWSER_MAX_RSS_MB': int(os.environ.get('BROWSER_MAX_RSS_MB') or 600),
         'LANGUAGES': ['fr', 'en'], 
         'BABEL_DEFAULT_LOCALE': 'fr', # Langue par défaut si rien n'est détecté        
     }
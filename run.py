@@ -1,5 +1,6 @@
 # run.py
 
+import click
 from app import create_app, db
 from app.models import User, FacebookPage, Notification, Broadcast, PublishedNews, GlobalMatchState, GlobalState, GlobalPublishedMatch
 
@@ -19,5 +20,65 @@ def create_tables():
         print("Tables connues par SQLAlchemy :", db.metadata.tables.keys())
 # --- FIN DE LA NOUVELLE SECTION ---
 
+@app.cli.command("import-published-matches")
+@click.argument('path', default="published_finished.json", type=click.Path(exists=True))
+def import_published_matches(path):
+    """Importe en une fois les IDs de l'ancien fichier published_finished.json."""
+    from app.published_matches import load_legacy_file, import_published_ids
+    with app.app_context():
+        ids = load_legacy_file(path)
+        added = import_published_ids(db.session, ids)
+        db.session.commit()
+        print(f"{added} match(s) importé(s) sur {len(ids)} ({len(ids) - added} déjà présent(s)).")
+
+# --- Bancs d'essai ---
+@app.cli.command("bench-parsers")
+@click.option('--live', multiple=True, type=click.Path(exists=True), help="Page live-score sauvegardée.")
+@click.option('--finished', multiple=True, type=click.Path(exists=True), help="Page live-foot sauvegardée.")
+@click.option('--match', multiple=True, type=click.Path(exists=True), help="Page de match ou de statistiques sauvegardée.")
+@click.option('--iterations', default=50, show_default=True)
+def bench_parsers(live, finished, match, iterations):
+    """Mesure le temps d'analyse et les allocations des parseurs (par défaut sur les pages de tests/fixtures)."""
+    from app.benchmarks import bench_parsers as run_bench
+    fixtures = {kind: paths for kind, paths in (('live', live), ('finished', finished), ('match', match)) if paths}
+    run_bench(fixtures or None, iterations)
+
+@app.cli.command("save-fixtures")
+@click.argument('directory')
+def save_fixtures(directory):
+    """Télécharge les pages matchendirect actuelles pour les bancs d'essai."""
+    from app.benchmarks import save_fixtures as run_save
+    with app.app_context():
+        run_save(tasks.get_fetcher(), directory, tasks.LIVE_URL, tasks.FINISHED_URL)
+
+@app.cli.command("bench-match-state")
+@click.option('--sizes', default="50,300,1000", show_default=True, help="Nombres de matchs en direct, séparés par des virgules.")
+@click.option('--database', default="sqlite://", show_default=True, help="URI d'une base de test (la table global_match_state y est recréée).")
+@click.option('--cycles', default=5, show_default=True)
+def bench_match_state(sizes, database, cycles):
+    """Compare l'écriture de l'état des matchs ligne à ligne et en upsert ensembliste."""
+    from app.benchmarks import bench_match_state as run_bench
+    run_bench([int(size) for size in sizes.split(',')], database, cycles)
+
+@app.cli.command("bench-graph-batch")
+@click.option('--pages', default=500, show_default=True)
+@click.option('--latency-ms', default=30, show_default=True, help="Temps de réponse simulé du serveur Graph local.")
+@click.option('--workers', default=16, show_default=True)
+@click.option('--batch-size', default=50, show_default=True)
+@click.option('--failure-rate', default=0.0, show_default=True, help="Part des opérations groupées en échec (repli individuel).")
+def bench_graph_batch(pages, latency_ms, workers, batch_size, failure_rate):
+    """Compare publications individuelles et requêtes groupées contre un serveur Graph local."""
+    from app.benchmarks import bench_graph_batch as run_bench
+    run_bench(pages, latency_ms / 1000, workers, min(50, batch_size), failure_rate)
+
+@app.cli.command("bench-shards")
+@click.option('--pages', default=5000, show_default=True)
+@click.option('--max-nodes', default=8, show_default=True)
+@click.option('--replicas', default=100, show_default=True, help="Points par publisher sur l'anneau.")
+def bench_shards(pages, max_nodes, replicas):
+    """Équilibre et déplacements de la répartition des pages entre publishers."""
+    from app.benchmarks import bench_shards as run_bench
+    run_bench(pages, max_nodes, replicas)
+
 if __name__ == '__main__':
     app.run(debug=True, use_reloader=False)
\ No newline at end of file
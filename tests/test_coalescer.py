@@ -0,0 +1,74 @@
+# tests/test_coalescer.py
+# Fusion des événements d'un même match en attente de publication.
+
+from app.coalescer import Coalescer, GOAL_PRIORITY, HALF_TIME_PRIORITY, KICKOFF_PRIORITY, SUMMARY_PRIORITY
+from app.tasks import merge_posts
+
+
+def post(text, fetch=None, compose=None, done=None):
+    return (text, fetch, (), compose, None, done)
+
+
+def test_goal_is_kept_when_half_time_follows():
+    coalescer = Coalescer(window_seconds=10, merge=merge_posts)
+    coalescer.add('m1', GOAL_PRIORITY, post("🚀 Buuuut de A !\nA 1 - 0 B"), now=100)
+    coalescer.add('m1', HALF_TIME_PRIORITY, post("⏸️ Mi-temps\nA 1 - 0 B"), now=101)
+    [released] = coalescer.release(now=120)
+    assert released.priority == GOAL_PRIORITY
+    assert released.payload[0] == "🚀 Buuuut de A !\nA 1 - 0 B\n\n⏸️ Mi-temps\nA 1 - 0 B"
+
+
+def test_two_goals_are_both_published():
+    coalescer = Coalescer(window_seconds=10, merge=merge_posts)
+    coalescer.add('m1', GOAL_PRIORITY, post("Buuuut de A !\nA 1 - 0 B"), now=100)
+    coalescer.add('m1', GOAL_PRIORITY, post("Buuuut de B !\nA 1 - 1 B"), now=101)
+    [released] = coalescer.release(now=120)
+    assert "Buuuut de A" in released.payload[0] and "Buuuut de B" in released.payload[0]
+
+
+def test_merged_enrichment_and_callbacks():
+    done = []
+    coalescer = Coalescer(window_seconds=10, merge=merge_posts)
+    coalescer.add('m1', GOAL_PRIORITY, post("But A", fetch=len, compose=lambda page: f"But A ({page})", done=done.append), now=100)
+    coalescer.add('m1', HALF_TIME_PRIORITY, post("Mi-temps", fetch=len, compose=lambda page: f"Mi-temps {page}"), now=101)
+    [released] = coalescer.release(now=120)
+    bare, fetch, _, compose, _, on_published = released.payload
+    # Les deux parties enrichies survivent : buteur du but et statistiques de la mi-temps
+    assert compose("stats") == "But A (stats)\n\nMi-temps stats"
+    on_published('m1')
+    assert done == ['m1']
+
+
+def test_newer_state_replaces_a_less_important_post():
+    coalescer = Coalescer(window_seconds=10, merge=merge_posts)
+    coalescer.add('m1', KICKOFF_PRIORITY, post("Coup d'envoi"), now=100)
+    coalescer.add('m1', GOAL_PRIORITY, post("But A"), now=101)
+    [released] = coalescer.release(now=120)
+    assert released.payload[0] == "But A"
+
+
+def test_without_merge_a_less_important_event_is_queued_separately():
+    coalescer = Coalescer(window_seconds=10)
+    coalescer.add('m1', GOAL_PRIORITY, post("But A"), now=100)
+    coalescer.add('m1', HALF_TIME_PRIORITY, post("Mi-temps"), now=101)
+    released = coalescer.release(now=120)
+    assert [p.payload[0] for p in released] == ["But A", "Mi-temps"]
+
+
+def test_enriched_and_plain_posts_merge():
+    coalescer = Coalescer(window_seconds=10, merge=merge_posts)
+    coalescer.add('m1', GOAL_PRIORITY, post("But A", fetch=len, compose=lambda page: f"But A ({page})"), now=100)
+    coalescer.add('m1', GOAL_PRIORITY, post("BUT REFUSÉ"), now=101)
+    coalescer.add('m1', HALF_TIME_PRIORITY, post("Mi-temps", fetch=len, compose=lambda page: f"Mi-temps {page}"), now=102)
+    [released] = coalescer.release(now=120)
+    assert released.payload[3]("stats") == "But A (stats)\n\nBUT REFUSÉ\n\nMi-temps stats"
+
+
+def test_summary_dropped_at_deadline_is_not_marked_published():
+    marked = []
+    coalescer = Coalescer(window_seconds=0, burst_budget=1, burst_seconds=60, merge=merge_posts, deadlines={SUMMARY_PRIORITY: 5})
+    coalescer.add('m1', GOAL_PRIORITY, post("But A"), now=100)
+    coalescer.add('summary', SUMMARY_PRIORITY, post("Scores", done=marked.append), now=100)
+    assert [p.key for p in coalescer.release(now=101)] == ['m1']
+    assert coalescer.release(now=110) == []
+    assert marked == [] and coalescer.dropped == 1
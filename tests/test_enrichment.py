@@ -0,0 +1,41 @@
+# tests/test_enrichment.py
+# Cache des pages de match : un seul chargement à la fois par match, même pendant la purge.
+
+import threading
+import time
+from app.enrichment import MatchEnrichmentCache
+
+
+def test_prune_keeps_the_lock_of_a_match_being_loaded():
+    release, state = threading.Event(), {'running': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def load(url, score):
+        if url != 'm':
+            return url
+        with lock:
+            state['running'] += 1
+            state['max'] = max(state['max'], state['running'])
+        release.wait(2)
+        with lock:
+            state['running'] -= 1
+        return url
+
+    cache = MatchEnrichmentCache(load, ttl=0.01)
+    release.set()
+    assert cache.get('m', 'm') == 'm'
+    time.sleep(0.05)
+    release.clear()
+
+    first = threading.Thread(target=cache.get, args=('m', 'm'))
+    first.start()
+    time.sleep(0.05)
+    # Un autre match purge l'entrée expirée de 'm' pendant son rechargement
+    assert cache.get('x', 'x') == 'x'
+    second = threading.Thread(target=cache.get, args=('m', 'm'))
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join(2)
+    second.join(2)
+    assert state['max'] == 1
@@ -0,0 +1,34 @@
+# tests/test_fanout.py
+# Limites de débit de la diffusion : un refus de l'application ne consomme pas le budget de la page.
+
+from app.fanout import FanoutEngine, RateLimited
+
+
+def make_engine():
+    return FanoutEngine(max_workers=2, page_rate=0.001, page_burst=2, app_rate=0.001, app_burst=1, max_wait=0)
+
+
+def test_app_refusal_refunds_the_page_token():
+    engine = make_engine()
+    assert engine._acquire('p1') is None
+    # Le seau de l'application est vide : refus, et le jeton de p1 est rendu
+    assert engine._acquire('p1') == "limite de débit de l'application"
+    assert engine._acquire('p1') == "limite de débit de l'application"
+    engine._app_bucket._tokens = 1
+    assert engine._acquire('p1') is None
+    assert engine._page_bucket('p1')._tokens < 1
+
+
+def test_throttled_broadcast_keeps_page_budget():
+    engine = make_engine()
+    sent = []
+    send = lambda target, session: sent.append(target) or target
+    first = engine.broadcast(['a'], send, key=lambda target: 'p1')
+    throttled = engine.broadcast(['b', 'c'], send, key=lambda target: 'p1')
+    assert first[0].error is None
+    assert all(isinstance(d.error, RateLimited) for d in throttled)
+    # Les envois refusés par l'application n'ont rien coûté à la page : il lui reste un jeton
+    engine._app_bucket._tokens = 1
+    again = engine.broadcast(['d'], send, key=lambda target: 'p1')
+    assert again[0].error is None and sent == ['a', 'd']
+    engine._executor.shutdown()
@@ -0,0 +1,83 @@
+# tests/test_fetchers.py
+# Requêtes conditionnelles et bascule vers Selenium de la couche de récupération.
+
+from app.fetchers import HttpFetcher, FallbackFetcher, PageChangeTracker, NOT_MODIFIED
+
+LIVE_URL = "https://www.matchendirect.fr/live-score/"
+SHELL = '<html><body><div id="app"></div><script src="/js/app.js"></script></body></html>'
+
+
+def rendered(score1, score2):
+    return (f'<table><tr data-matchid="1"><td class="lm2">12\'</td><td class="lm3"><span class="lm3_eq1">A</span>'
+            f'<span class="scored_1">{score1}</span> - <span class="scored_2">{score2}</span><span class="lm3_eq2">B</span></td></tr></table>')
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSession:
+    """Serveur qui renvoie toujours la même coquille JS, avec un ETag, et 304 si on le lui présente."""
+
+    def __init__(self, body=SHELL, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {'ETag': self.etag})
+
+
+class FakeBrowser:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.calls = 0
+
+    def fetch(self, url, selector=None, wait=10, conditional=False):
+        self.calls += 1
+        return self.pages.pop(0)
+
+
+def make_fetcher(session, browser):
+    http = HttpFetcher()
+    http.session = session
+    return FallbackFetcher(http, browser)
+
+
+def test_selenium_fallback_does_not_keep_validators():
+    session, browser = FakeSession(), FakeBrowser([rendered(0, 0), rendered(1, 0)])
+    fetcher, tracker = make_fetcher(session, browser), PageChangeTracker()
+
+    # Cycle 0 : la coquille HTTP n'a pas les scores, la page est rendue par Selenium
+    html = fetcher.fetch(LIVE_URL, "td.lm3", conditional=True)
+    unchanged, fingerprint = tracker.is_unchanged(LIVE_URL, html)
+    assert not unchanged
+    tracker.mark_processed(LIVE_URL, fingerprint)
+
+    # Cycle 1 : pas de requête conditionnelle, donc pas de 304, et le but est vu
+    html = fetcher.fetch(LIVE_URL, "td.lm3", conditional=True)
+    assert html is not NOT_MODIFIED
+    assert 'If-None-Match' not in session.requests[1]
+    assert browser.calls == 2
+    assert not tracker.is_unchanged(LIVE_URL, html)[0]
+    assert '<span class="scored_1">1</span>' in html
+
+
+def test_http_page_with_selector_uses_conditional_requests():
+    session, browser = FakeSession(body=rendered(0, 0)), FakeBrowser([])
+    fetcher = make_fetcher(session, browser)
+
+    assert fetcher.fetch(LIVE_URL, "td.lm3", conditional=True) == rendered(0, 0)
+    assert fetcher.fetch(LIVE_URL, "td.lm3", conditional=True) is NOT_MODIFIED
+    assert session.requests[1]['If-None-Match'] == '"v1"'
+    assert browser.calls == 0
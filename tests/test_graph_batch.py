@@ -0,0 +1,106 @@
+# tests/test_graph_batch.py
+# Repli des publications groupées : appels individuels seulement quand le lot n'a pas été traité.
+
+import json
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from app.fanout import PageTarget
+from app.graph_batch import make_senders, batch_not_processed
+from facebook import GraphAPIError
+
+
+class FakeGraph:
+    version = 'v19.0'
+
+    def __init__(self, published):
+        self.published = published
+
+    def put_object(self, parent_object, connection_name, message):
+        self.published.append(parent_object)
+        return {'id': f"{parent_object}_single"}
+
+
+class FakeClients:
+    def __init__(self):
+        self.published = []
+
+    def get(self, page_id, encrypted_token):
+        return f"token-{page_id}", FakeGraph(self.published)
+
+
+class FakeResponse:
+    def __init__(self, payload=None, text=None):
+        self._payload, self._text = payload, text
+
+    def json(self):
+        if self._text is not None:
+            return json.loads(self._text)
+        return self._payload
+
+
+class FakeSession:
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def post(self, url, data=None, timeout=None):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+BATCH = [(i, PageTarget(f"p{i}", f"Page {i}", b"token"), None) for i in range(3)]
+
+
+def send(outcome):
+    clients = FakeClients()
+    _, send_grouped = make_senders(clients, "But !", "http://graph.test")
+    return send_grouped(BATCH, FakeSession(outcome)), clients.published
+
+
+def connection_refused():
+    reason = NewConnectionError(None, "connexion refusée")
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "/", reason))
+
+
+def test_connection_error_before_sending_falls_back_to_single_posts():
+    outcomes, published = send(connection_refused())
+    assert published == ['p0', 'p1', 'p2']
+    assert all(error is None for _, error in outcomes)
+
+
+def test_top_level_graph_error_falls_back_to_single_posts():
+    outcomes, published = send(FakeResponse({'error': {'message': 'Invalid OAuth access token', 'code': 190}}))
+    assert published == ['p0', 'p1', 'p2']
+
+
+def test_read_timeout_is_left_to_the_outbox():
+    outcomes, published = send(requests.exceptions.ReadTimeout("délai de lecture dépassé"))
+    assert published == []
+    assert all(result is None and error is not None for result, error in outcomes)
+
+
+def test_unreadable_5xx_body_is_left_to_the_outbox():
+    outcomes, published = send(FakeResponse(text='<html>502 Bad Gateway</html>'))
+    assert published == []
+    assert len(outcomes) == 3
+
+
+def test_item_errors():
+    items = [
+        {'code': 200, 'body': json.dumps({'id': 'p0_1'})},
+        {'code': 400, 'body': json.dumps({'error': {'message': 'Refusé', 'code': 100}})},
+        None,
+    ]
+    outcomes, published = send(FakeResponse(items))
+    assert outcomes[0] == ('p0_1', None)
+    # Opération refusée par Graph : repli individuel ; opération sans réponse : laissée à la file
+    assert published == ['p1']
+    assert outcomes[2][0] is None and outcomes[2][1] is not None
+
+
+def test_batch_not_processed():
+    assert batch_not_processed(connection_refused())
+    assert batch_not_processed(requests.exceptions.ConnectTimeout())
+    assert batch_not_processed(GraphAPIError({'error': {'message': 'x'}}))
+    assert not batch_not_processed(requests.exceptions.ReadTimeout())
+    assert not batch_not_processed(ValueError("JSON illisible"))
@@ -0,0 +1,55 @@
+# tests/test_match_state.py
+# Détection des événements sur les transitions d'état d'un match.
+
+from app.match_state import MatchRecord, MatchStateStore, detect_events, KICKOFF, GOAL, HALF_TIME
+from app.tasks import get_live_scores
+from app.parsers import LiveScore, _statut
+
+
+def live(score, minute):
+    return LiveScore('1', 'A', 'B', score, minute, _statut(minute), None)
+
+
+def record(score, minute):
+    return MatchRecord.from_live(live(score, minute))
+
+
+def kinds(old, new):
+    return [event.kind for event in detect_events(old, new)]
+
+
+def test_kickoff_only_before_the_match():
+    assert kinds(None, live('0 - 0', "1'")) == [KICKOFF]
+    assert kinds(record('0 - 0', ''), live('0 - 0', "2'")) == [KICKOFF]
+    assert kinds(record('0 - 0', '20:45'), live('0 - 0', "1'")) == [KICKOFF]
+    assert kinds(record('-', ''), live('0 - 0', "1'")) == [KICKOFF]
+
+
+def test_goal_across_a_break_is_not_a_kickoff():
+    assert kinds(record('1 - 1', 'Pause'), live('2 - 1', "92'")) == [GOAL]
+    assert kinds(record('1 - 1', 'Prol.'), live('1 - 2', "97'")) == [GOAL]
+    assert kinds(record('1 - 1', 'Pause'), live('1 - 1', "91'")) == []
+
+
+def test_half_time_and_restart():
+    assert kinds(record('1 - 0', "44'"), live('1 - 0', 'Mi-temps')) == [HALF_TIME]
+    assert kinds(record('1 - 0', 'Mi-temps'), live('1 - 1', "46'")) == [GOAL]
+
+
+def test_empty_or_failed_scrape_keeps_the_store():
+    store = MatchStateStore()
+    store.load([])
+    store.apply([live('1 - 0', "30'")])
+    store.take_snapshot()
+    before = {key: (r.score, r.minute) for key, r in store.records().items()}
+    assert store.apply([]) == []
+    assert store.apply(iter(())) == []
+    assert {key: (r.score, r.minute) for key, r in store.records().items()} == before
+    assert not store.pending
+    # Au relevé suivant, le match est toujours connu : un but, pas un nouveau coup d'envoi
+    assert [event.kind for event in store.apply([live('2 - 0', "35'")])] == [GOAL]
+
+
+def test_failed_live_page_is_not_applied():
+    assert get_live_scores(None) is None
+    assert get_live_scores('') is None
@@ -0,0 +1,29 @@
+# tests/test_metrics.py
+# Comptage des erreurs : une exception remontant d'une phase n'est comptée qu'une fois.
+
+from app.metrics import Metrics
+
+
+def errors(metrics):
+    return {dict(labels)['phase']: value for (name, labels), value in metrics.snapshot()['counters'].items()
+            if name == 'errors_total'}
+
+
+def test_error_escaping_a_span_is_not_counted_again_by_the_cycle():
+    metrics = Metrics()
+    try:
+        with metrics.span('finished_scan'):
+            raise ValueError("page indisponible")
+    except ValueError as e:
+        assert metrics.error('cycle', e) is False
+    assert errors(metrics) == {'finished_scan': 1}
+
+
+def test_error_outside_any_span_is_counted_by_the_cycle():
+    metrics = Metrics()
+    try:
+        raise RuntimeError("base indisponible")
+    except RuntimeError as e:
+        assert metrics.error('cycle', e) is True
+        assert metrics.error('cycle', e) is False
+    assert errors(metrics) == {'cycle': 1}
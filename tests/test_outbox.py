@@ -0,0 +1,36 @@
+# tests/test_outbox.py
+# Envois d'édition : jamais de publication d'un nouveau post à la place de l'édition.
+
+from datetime import datetime
+from types import SimpleNamespace
+from app.outbox import resolve_edit, PENDING, SENT, DEAD
+
+
+def delivery():
+    return SimpleNamespace(status=PENDING, last_error=None, next_attempt_at=None)
+
+
+def test_edit_uses_the_parent_post_id():
+    assert resolve_edit(delivery(), SimpleNamespace(status=SENT, post_id='p1_42')) == 'p1_42'
+
+
+def test_edit_of_a_sent_parent_without_post_id_is_dead_lettered():
+    edit = delivery()
+    assert resolve_edit(edit, SimpleNamespace(status=SENT, post_id=None)) is None
+    assert edit.status == DEAD
+    assert 'identifiant' in edit.last_error
+
+
+def test_edit_waits_for_a_pending_parent():
+    edit, due = delivery(), datetime(2026, 1, 1, 12, 0)
+    assert resolve_edit(edit, SimpleNamespace(status=PENDING, post_id=None, next_attempt_at=due)) is None
+    assert edit.status == PENDING and edit.next_attempt_at > due
+
+
+def test_edit_without_parent_is_dead_lettered():
+    edit = delivery()
+    assert resolve_edit(edit, None) is None
+    assert edit.status == DEAD
+    edit = delivery()
+    assert resolve_edit(edit, SimpleNamespace(status=DEAD, post_id=None)) is None
+    assert edit.status == DEAD
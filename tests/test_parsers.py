@@ -0,0 +1,72 @@
+# tests/test_parsers.py
+# Non-régression des parseurs Lexbor sur les pages enregistrées dans tests/fixtures :
+# mêmes enregistrements que l'analyse BeautifulSoup de référence, et analyse plus rapide.
+
+import os
+import time
+import pytest
+from app.benchmarks import PARSERS, BS4_PARSERS, fixture_paths
+from app.parsers import has_selector, parse_live_scores, parse_finished_matches, parse_match_page
+
+FIXTURES = [(kind, path) for kind, paths in fixture_paths().items() for path in paths]
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _best_of(func, html, repeat=5, number=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(html)
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+@pytest.mark.parametrize('kind,path', FIXTURES, ids=[os.path.basename(path) for _, path in FIXTURES])
+def test_lexbor_matches_bs4_reference(kind, path):
+    html = _read(path)
+    assert PARSERS[kind](html) == BS4_PARSERS[kind](html)
+
+
+@pytest.mark.parametrize('kind,path', FIXTURES, ids=[os.path.basename(path) for _, path in FIXTURES])
+def test_lexbor_faster_than_bs4(kind, path):
+    html = _read(path)
+    lexbor, bs4 = _best_of(PARSERS[kind], html), _best_of(BS4_PARSERS[kind], html)
+    print(f"{kind}: lexbor {lexbor * 1000:.2f} ms, bs4 {bs4 * 1000:.2f} ms (x{bs4 / lexbor:.1f})")
+    assert lexbor < bs4
+
+
+def test_live_page_records():
+    scores = parse_live_scores(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'live.html')))
+    assert scores
+    # Les matchs pas encore commencés (sans score) sont ignorés
+    assert all(score.score.replace(' ', '').count('-') == 1 for score in scores)
+    assert all(score.match_id and score.url.startswith('https://www.matchendirect.fr/') for score in scores)
+    assert {score.statut for score in scores} <= {'', 'MT', 'TER'}
+    assert any(score.statut == 'MT' for score in scores)
+
+
+def test_finished_page_records():
+    finished = parse_finished_matches(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'finished.html')))
+    assert finished
+    assert all(match.score != 'v' for match in finished)
+    assert len({match.match_id for match in finished}) == len(finished)
+
+
+def test_match_page_record():
+    page = parse_match_page(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'match_stats.html')))
+    assert page.last_goal == ('Aubameyang P. (pen.)', "88'")
+    assert page.penalties == '4 - 3'
+    # Les titres répétés ne sont gardés qu'une fois
+    assert [stat.title for stat in page.stats][:2] == ['Possession', 'Tirs']
+    assert len({stat.title for stat in page.stats}) == len(page.stats)
+
+
+def test_selectors_present_in_fixtures():
+    assert has_selector(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'live.html')), 'td.lm3')
+    assert has_selector(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'finished.html')), 'tr[data-matchid]')
+    assert not has_selector(_read(os.path.join(os.path.dirname(__file__), 'fixtures', 'match_stats.html')), 'td.lm3')
@@ -1,14 +1,70 @@
+import argparse
+import signal
+import time
 from app import create_app, scheduler
 from app import tasks
+from app.supervisor import WorkerSupervisor, ProcessSupervisor
+from app.metrics import metrics, render
 
 app = create_app()
 tasks.init_app(app)
 
-if __name__ == '__main__':
+
+def start_roles(roles, supervisor, beat=None, metrics_queue=None):
+    tasks.configure_roles(roles)
+    if 'scraper' in roles:
+        # Le scraper possède le pool de navigateurs : Chrome reste chaud entre les cycles
+        tasks.init_browser_pool()
+
+    # Battement de vie : s'il s'arrête, l'ordonnanceur est bloqué (503 sur /health/live, enfant relancé)
+    def heartbeat():
+        supervisor.beat()
+        if beat is not None: beat.value = time.time()
+        if metrics_queue is not None: metrics_queue.put((roles[0], metrics.snapshot()))
+    scheduler.add_job(id='worker_heartbeat_job', func=heartbeat, trigger='interval', seconds=10, replace_existing=True)
+    scheduler.start(paused=True) # On démarre en pause
+    scheduler.resume() # On le relance
+
+
+def stop():
+    tasks.drain_and_shutdown(app.config['WORKER_DRAIN_SECONDS'])
+
+
+def run_role(role, beat, metrics_queue):
+    """Processus enfant d'un rôle : arrêté par le SIGTERM du superviseur (Ctrl-C n'est traité que par le parent)."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    supervisor = WorkerSupervisor(role, liveness_seconds=app.config['WORKER_LIVENESS_SECONDS'], signals=(signal.SIGTERM,))
     with app.app_context():
-        print("Starting scheduler worker...")
-        # La boucle infinie est nécessaire pour que le worker ne s'arrête pas
-        scheduler.start(paused=True) # On démarre en pause
-        scheduler.resume() # On le relance
-        while True:
-            pass
+        supervisor.run(lambda: start_roles([role], supervisor, beat, metrics_queue), stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker des tâches planifiées.")
+    parser.add_argument('roles', nargs='*', metavar='ROLE',
+                        help=f"rôles à exécuter parmi {', '.join(tasks.ROLE_JOBS)} (par défaut : tous)")
+    parser.add_argument('--inline', action='store_true',
+                        help="exécute les rôles dans ce processus plutôt qu'un processus supervisé par rôle")
+    args = parser.parse_args()
+    unknown = set(args.roles) - set(tasks.ROLE_JOBS)
+    if unknown:
+        parser.error(f"rôle(s) inconnu(s) : {', '.join(sorted(unknown))}")
+    roles = list(dict.fromkeys(args.roles)) or list(tasks.ROLE_JOBS)
+    liveness = app.config['WORKER_LIVENESS_SECONDS']
+
+    with app.app_context():
+        print(f"Starting scheduler worker ({', '.join(roles)})...")
+        if args.inline:
+            supervisor = WorkerSupervisor('+'.join(roles), liveness_seconds=liveness, metrics=lambda: render([({}, metrics.snapshot())]))
+            supervisor.serve_health(app.config['WORKER_HEALTH_PORT'])
+            # Attente bloquante jusqu'à SIGTERM/SIGINT : plus de boucle active entre les cycles
+            supervisor.run(lambda: start_roles(roles, supervisor), stop)
+            return
+        processes = ProcessSupervisor(roles, run_role, liveness_seconds=liveness)
+        supervisor = WorkerSupervisor('superviseur', liveness_seconds=liveness, details=processes.status, ready_check=processes.all_alive,
+                                      metrics=processes.render_metrics)
+        supervisor.serve_health(app.config['WORKER_HEALTH_PORT'])
+        supervisor.run(lambda: processes.start(supervisor), lambda: processes.stop(app.config['WORKER_DRAIN_SECONDS'] + 10))
+
+
+if __name__ == '__main__':
+    main()